@@ -18,6 +18,7 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 
 from src.analytics_agent import AnalyticsAgent
+from src.openai_client import run_sync
 from src.tts import TextToSpeech
 from src.stt import SpeechToText
 from src.config import OPENAI_API_KEY
@@ -69,7 +70,7 @@ def _log_sql(question: str, sql: str, status: str):
 
 def answer_question(agent: AnalyticsAgent, engine: Engine, question: str, speak: bool = False,
                     tts: TextToSpeech = None) -> Dict[str, Any]:
-    plan = agent.generate_sql(question)
+    plan = run_sync(agent.generate_sql(question))
     if plan.get("needs_clarification"):
         return {
             "needs_clarification": True,
@@ -86,7 +87,7 @@ def answer_question(agent: AnalyticsAgent, engine: Engine, question: str, speak:
         _log_sql(question, sql, "execution_error")
         return {"error": f"SQL execution error: {e}"}
     meta = {"row_count": len(rows)}
-    summary = agent.summarize(question, rows, meta)
+    summary = run_sync(agent.summarize(question, rows, meta))
     if speak and tts:
         tts.speak(summary)
     return {"summary": summary, "sql": sql}
@@ -33,6 +33,7 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.engine import Engine
 from src.analytics_agent import AnalyticsAgent
+from src.openai_client import run_sync
 import yaml
 
 try:
@@ -1441,7 +1442,7 @@ def main():
             f"{question}\n"
             f"Scope analytics to business_id={selected_business_id} whenever the referenced table has a business_id column."
         )
-        plan = agent.generate_sql(scoped_question)
+        plan = run_sync(agent.generate_sql(scoped_question))
         if plan.get("error"):
             return f"SQL generation error: {plan['error']}", ""
         sql = plan.get("sql", "")
@@ -1450,7 +1451,7 @@ def main():
         except Exception as e:
             return f"SQL execution error: {e}", sql
         meta = {"row_count": len(rows)}
-        summary = agent.summarize(question, rows, meta)
+        summary = run_sync(agent.summarize(question, rows, meta))
         return summary, sql
 
     app.run(debug=True, host="0.0.0.0", port=int(os.getenv("PORT", 8050)))
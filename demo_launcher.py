@@ -1,17 +1,54 @@
 """Simple demo launcher UI for Voice Facilitator."""
 import os
 import sys
-import subprocess
-import webbrowser
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
 from pathlib import Path
-import yaml
 
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_DIR = Path(ROOT_DIR) / "config"
 
+_STYLE_SPECS = (
+    ("App.TFrame", {"background": "#eef3fb"}),
+    ("Hero.TFrame", {"background": "#0f1f3d"}),
+    ("HeroTitle.TLabel", {"background": "#0f1f3d", "foreground": "#f8fafc", "font": ("Helvetica", 24, "bold")}),
+    ("HeroSub.TLabel", {"background": "#0f1f3d", "foreground": "#cdd8ef", "font": ("Helvetica", 11)}),
+    ("Section.TLabelframe", {"background": "#f6f9ff", "borderwidth": 1, "relief": "solid"}),
+    ("Section.TLabelframe.Label", {"background": "#f6f9ff", "foreground": "#1e3a5f", "font": ("Helvetica", 12, "bold")}),
+    ("Meta.TLabel", {"background": "#f6f9ff", "foreground": "#4b5d78", "font": ("Helvetica", 10)}),
+    ("Status.TLabel", {"background": "#e8eef8", "foreground": "#1f2a3d", "font": ("Helvetica", 11, "bold")}),
+    ("Footer.TFrame", {"background": "#e8eef8"}),
+    ("Primary.TButton", {"font": ("Helvetica", 11, "bold"), "padding": (12, 10)}),
+    ("Secondary.TButton", {"font": ("Helvetica", 10), "padding": (10, 8)}),
+    ("Danger.TButton", {"font": ("Helvetica", 10, "bold"), "padding": (12, 10)}),
+    ("Large.TCombobox", {"padding": 6}),
+)
+
+
+def _scan_config_entries():
+    """Return business_config*.yaml directory entries sorted by name."""
+    try:
+        with os.scandir(CONFIG_DIR) as it:
+            return sorted(
+                (
+                    e for e in it
+                    if e.name.startswith("business_config") and e.name.endswith(".yaml") and e.is_file()
+                ),
+                key=lambda e: e.name,
+            )
+    except FileNotFoundError:
+        return []
+
+
+def _entry_fingerprint(entry):
+    try:
+        st = entry.stat()
+        return (entry.path, st.st_mtime, st.st_size)
+    except OSError:
+        return (entry.path, None, None)
+
 
 class DemoLauncher(tk.Tk):
     def __init__(self):
@@ -21,9 +58,16 @@ class DemoLauncher(tk.Tk):
         self.minsize(900, 700)
         self.resizable(True, True)
 
-        self.processes = {}
+        # Live child processes by launch key; pruned by _reap_processes.
+        self._alive = {}
         self.config_map = {}
         self._config_snapshot = tuple()
+        # Per-path caches so refreshes only re-parse added/modified configs.
+        self._path_to_label = {}
+        self._path_to_relpath = {}
+        self._path_to_mtime = {}
+        self._cfg_dir_mtime = -1
+        self._cfg_max_file_mtime = -1
         self._configure_styles()
 
         wrapper = ttk.Frame(self, padding=20, style="App.TFrame")
@@ -102,6 +146,7 @@ class DemoLauncher(tk.Tk):
 
         self._load_config_options()
         self.after(2000, self._auto_refresh_configs)
+        self.after(1000, self._reap_processes)
 
     def _configure_styles(self):
         style = ttk.Style(self)
@@ -109,19 +154,8 @@ class DemoLauncher(tk.Tk):
             style.theme_use("clam")
         except Exception:
             pass
-        style.configure("App.TFrame", background="#eef3fb")
-        style.configure("Hero.TFrame", background="#0f1f3d")
-        style.configure("HeroTitle.TLabel", background="#0f1f3d", foreground="#f8fafc", font=("Helvetica", 24, "bold"))
-        style.configure("HeroSub.TLabel", background="#0f1f3d", foreground="#cdd8ef", font=("Helvetica", 11))
-        style.configure("Section.TLabelframe", background="#f6f9ff", borderwidth=1, relief="solid")
-        style.configure("Section.TLabelframe.Label", background="#f6f9ff", foreground="#1e3a5f", font=("Helvetica", 12, "bold"))
-        style.configure("Meta.TLabel", background="#f6f9ff", foreground="#4b5d78", font=("Helvetica", 10))
-        style.configure("Status.TLabel", background="#e8eef8", foreground="#1f2a3d", font=("Helvetica", 11, "bold"))
-        style.configure("Footer.TFrame", background="#e8eef8")
-        style.configure("Primary.TButton", font=("Helvetica", 11, "bold"), padding=(12, 10))
-        style.configure("Secondary.TButton", font=("Helvetica", 10), padding=(10, 8))
-        style.configure("Danger.TButton", font=("Helvetica", 10, "bold"), padding=(12, 10))
-        style.configure("Large.TCombobox", padding=6)
+        for name, opts in _STYLE_SPECS:
+            style.configure(name, **opts)
 
     def _build_admin_buttons(self):
         self._add_button(
@@ -163,14 +197,25 @@ class DemoLauncher(tk.Tk):
         btn.pack(fill="x", pady=7)
 
     def _load_config_options(self):
+        self._cfg_dir_mtime = self._config_dir_mtime()
+        self._config_snapshot = tuple(_entry_fingerprint(e) for e in _scan_config_entries())
+        self._cfg_max_file_mtime = max((mt or 0 for _, mt, _ in self._config_snapshot), default=0)
+        current = {key for key, _, _ in self._config_snapshot}
+        for key in list(self._path_to_label):
+            if key not in current:
+                self._path_to_label.pop(key, None)
+                self._path_to_relpath.pop(key, None)
+                self._path_to_mtime.pop(key, None)
+
         self.config_map = {}
-        config_paths = sorted(CONFIG_DIR.glob("business_config*.yaml"))
-        self._config_snapshot = tuple(str(p) for p in config_paths)
-        options = []
-        for path in config_paths:
-            label = self._format_config_label(path)
-            self.config_map[label] = str(path.relative_to(ROOT_DIR))
-            options.append(label)
+        for key, mtime, _size in self._config_snapshot:
+            if key not in self._path_to_label or self._path_to_mtime.get(key) != mtime:
+                path = Path(key)
+                self._path_to_label[key] = self._format_config_label(path)
+                self._path_to_relpath.setdefault(key, os.path.relpath(key, ROOT_DIR))
+                self._path_to_mtime[key] = mtime
+            self.config_map[self._path_to_label[key]] = self._path_to_relpath[key]
+        options = list(self.config_map)
         self.config_combo["values"] = options
         if not options:
             self.config_var.set("")
@@ -180,11 +225,32 @@ class DemoLauncher(tk.Tk):
             self.config_var.set(options[0])
         self._on_config_selected()
 
+    @staticmethod
+    def _config_dir_mtime():
+        try:
+            return os.stat(CONFIG_DIR).st_mtime
+        except OSError:
+            return None
+
+    def _configs_maybe_changed(self) -> bool:
+        """Cheap check before rescanning: dir mtime covers add/remove, file mtimes cover edits."""
+        if self._config_dir_mtime() != self._cfg_dir_mtime:
+            return True
+        max_mtime = 0
+        for path, _, _ in self._config_snapshot:
+            try:
+                max_mtime = max(max_mtime, os.stat(path).st_mtime)
+            except OSError:
+                return True
+        return max_mtime != self._cfg_max_file_mtime
+
     def _auto_refresh_configs(self):
         """Keep config dropdown in sync with files created by the builder."""
         try:
-            current_paths = tuple(str(p) for p in sorted(CONFIG_DIR.glob("business_config*.yaml")))
-            if current_paths != self._config_snapshot:
+            if not self._configs_maybe_changed():
+                return
+            current_snapshot = tuple(_entry_fingerprint(e) for e in _scan_config_entries())
+            if current_snapshot != self._config_snapshot:
                 previous_value = self.config_var.get()
                 self._load_config_options()
                 # Keep previous selection if still available; otherwise leave loader default.
@@ -192,10 +258,15 @@ class DemoLauncher(tk.Tk):
                     self.config_var.set(previous_value)
                     self._on_config_selected()
                 self.status.set("Detected new/updated config files.")
+            else:
+                # Unrelated directory change; remember it so the next tick stays cheap.
+                self._cfg_dir_mtime = self._config_dir_mtime()
         finally:
             self.after(2000, self._auto_refresh_configs)
 
     def _format_config_label(self, path: Path) -> str:
+        import yaml
+
         try:
             with path.open("r", encoding="utf-8") as f:
                 data = yaml.safe_load(f) or {}
@@ -213,6 +284,8 @@ class DemoLauncher(tk.Tk):
             self.business_preview.set("No business config selected.")
             return
         cfg_path = Path(ROOT_DIR) / rel_path
+        import yaml
+
         try:
             with cfg_path.open("r", encoding="utf-8") as f:
                 data = yaml.safe_load(f) or {}
@@ -250,6 +323,8 @@ class DemoLauncher(tk.Tk):
         self._launch("dashboard", [sys.executable, "dashboard_dash.py"], env=env)
 
     def _launch_business_builder(self):
+        import webbrowser
+
         self._launch(
             "business_builder",
             [sys.executable, "business_builder_server.py"],
@@ -266,6 +341,8 @@ class DemoLauncher(tk.Tk):
             messagebox.showerror("Missing config", "Please select a business config first.")
             return
 
+        import subprocess
+
         base_env = os.environ.copy()
         base_env["CONFIG_FILE"] = rel_path
         self.status.set(f"Preparing daily staff emails using {rel_path}...")
@@ -318,11 +395,21 @@ class DemoLauncher(tk.Tk):
             self.status.set("Email send failed.")
             messagebox.showerror("Daily Emails Failed", str(e))
 
+    def _reap_processes(self):
+        """Drop exited children so they don't linger as zombies."""
+        try:
+            for key, proc in list(self._alive.items()):
+                if proc.poll() is not None:
+                    del self._alive[key]
+        finally:
+            self.after(1000, self._reap_processes)
+
     def _launch(self, key, cmd, env=None):
-        proc = self.processes.get(key)
-        if proc and proc.poll() is None:
+        if key in self._alive and self._alive[key].poll() is None:
             messagebox.showinfo("Already running", f"{key.replace('_', ' ').title()} is already running.")
             return
+        import subprocess
+
         try:
             self.status.set(f"Launching {key.replace('_', ' ')}...")
             proc = subprocess.Popen(
@@ -330,7 +417,7 @@ class DemoLauncher(tk.Tk):
                 cwd=ROOT_DIR,
                 env=env or os.environ.copy(),
             )
-            self.processes[key] = proc
+            self._alive[key] = proc
             if key in {"voice_bot", "dashboard"} and env and env.get("CONFIG_FILE"):
                 self.status.set(f"Running: {key.replace('_', ' ')} ({env['CONFIG_FILE']})")
             else:
@@ -340,15 +427,33 @@ class DemoLauncher(tk.Tk):
             messagebox.showerror("Launch failed", str(e))
 
     def _stop_all(self):
-        stopped_any = False
-        for key, proc in list(self.processes.items()):
-            if proc and proc.poll() is None:
-                try:
-                    proc.terminate()
-                    stopped_any = True
-                except Exception:
-                    pass
-        self.status.set("Stopped all running processes." if stopped_any else "No active processes to stop.")
+        """Terminate every live child, then poll for exit via after() so Tk stays responsive."""
+        procs = [proc for proc in self._alive.values() if proc.poll() is None]
+        self._alive.clear()
+        for proc in procs:
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+        if not procs:
+            self.status.set("No active processes to stop.")
+            return
+        self.status.set(f"Stopping {len(procs)} process(es)...")
+        self._await_stopped(procs, time.monotonic() + 3)
+
+    def _await_stopped(self, procs, deadline):
+        """Check the terminated children every 100 ms until they exit or the deadline passes."""
+        procs = [proc for proc in procs if proc.poll() is None]
+        if procs and time.monotonic() < deadline:
+            self.after(100, self._await_stopped, procs, deadline)
+            return
+        if procs:
+            # Leave stragglers to _reap_processes; another Stop All terminates them again.
+            for proc in procs:
+                self._alive[f"stopping_{proc.pid}"] = proc
+            self.status.set(f"{len(procs)} process(es) still shutting down.")
+        else:
+            self.status.set("Stopped all running processes.")
 
 
 def main():
@@ -12,11 +12,17 @@ Optional:
 import os
 import sys
 import smtplib
+from functools import lru_cache
 from datetime import datetime, date
+from itertools import groupby
+from operator import attrgetter
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from zoneinfo import ZoneInfo
 
+import pymysql
+from jinja2 import Environment
+
 from src.config_loader import ConfigLoader
 from src.database import Database
 from src.config import APP_TIMEZONE
@@ -33,11 +39,9 @@ def _get_timezone(config: ConfigLoader) -> str:
     return config.get("business.timezone", APP_TIMEZONE) or APP_TIMEZONE
 
 
-def _today_in_tz(tz_name: str) -> date:
-    try:
-        return datetime.now(ZoneInfo(tz_name)).date()
-    except Exception:
-        return datetime.now().date()
+@lru_cache(maxsize=8)
+def _tz(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
 
 
 def _target_date(tz_name: str) -> date:
@@ -47,7 +51,11 @@ def _target_date(tz_name: str) -> date:
             return datetime.strptime(override, "%Y-%m-%d").date()
         except ValueError:
             print(f"Invalid EMAIL_DATE_OVERRIDE '{override}'. Expected YYYY-MM-DD. Falling back to today.")
-    return _today_in_tz(tz_name)
+    try:
+        tz = _tz(tz_name)
+    except Exception:
+        tz = None
+    return datetime.now(tz).date()
 
 
 def _load_staff_emails(config: ConfigLoader) -> dict:
@@ -61,52 +69,150 @@ def _load_staff_emails(config: ConfigLoader) -> dict:
     return staff_map
 
 
-def _fetch_appointments_for_date(db: Database, appt_date: date, business_id: int):
-    with db.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT a.id, a.appointment_date, a.appointment_time, a.duration_minutes, a.status,
-                   s.name AS service_name, st.name AS staff_name, c.name AS customer_name, c.phone AS customer_phone
-            FROM appointments a
-            LEFT JOIN services s ON a.service_id = s.id
-            LEFT JOIN staff st ON a.staff_id = st.id
-            LEFT JOIN customers c ON a.customer_id = c.id
-            WHERE a.business_id = %s AND a.appointment_date = %s AND a.status = 'scheduled'
-            ORDER BY st.name, a.appointment_time
-            """,
-            (business_id, appt_date),
-        )
-        return cursor.fetchall()
-
-
-def _resolve_business_id(db: Database, config: ConfigLoader) -> int:
+class Appointment:
+    """Lightweight row record for a scheduled appointment."""
+
+    __slots__ = (
+        "id",
+        "appointment_time",
+        "duration_minutes",
+        "service_name",
+        "staff_name",
+        "customer_name",
+        "customer_phone",
+    )
+
+    def __init__(self, row: dict):
+        self.id = row.get("id")
+        self.appointment_time = row.get("appointment_time")
+        self.duration_minutes = row.get("duration_minutes")
+        self.service_name = row.get("service_name")
+        self.staff_name = row.get("staff_name") or "Unassigned"
+        self.customer_name = row.get("customer_name")
+        self.customer_phone = row.get("customer_phone")
+
+
+_APPOINTMENTS_SQL = """
+    SELECT a.id, a.appointment_date, a.appointment_time, a.duration_minutes, a.status,
+           s.name AS service_name, st.name AS staff_name, c.name AS customer_name, c.phone AS customer_phone
+    FROM appointments a
+    LEFT JOIN services s ON a.service_id = s.id
+    LEFT JOIN staff st ON a.staff_id = st.id
+    LEFT JOIN customers c ON a.customer_id = c.id
+    WHERE {business_clause} AND a.appointment_date = %s AND a.status = 'scheduled'
+    ORDER BY st.name, a.appointment_time
+"""
+# Both statement variants are built once at import instead of per run.
+_APPOINTMENTS_BY_ID_SQL = _APPOINTMENTS_SQL.format(business_clause="a.business_id = %s")
+# Without a numeric id in the config, the name lookup is inlined as a scalar
+# subquery so the fetch stays a single round trip.
+_APPOINTMENTS_BY_NAME_SQL = _APPOINTMENTS_SQL.format(
+    business_clause=(
+        "a.business_id = COALESCE("
+        "(SELECT b.id FROM businesses b WHERE LOWER(b.name) = LOWER(%s) LIMIT 1), 1)"
+    )
+)
+
+
+def _appointments_query(config: ConfigLoader, appt_date: date):
+    """Pick the appointment statement and params for the configured business."""
     config_business_id = config.get("business.id")
     if config_business_id:
         try:
-            return int(config_business_id)
+            return _APPOINTMENTS_BY_ID_SQL, (int(config_business_id), appt_date)
         except (TypeError, ValueError):
             pass
-    business_name = config.get_business_name()
-    with db.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id FROM businesses WHERE LOWER(name) = LOWER(%s) LIMIT 1",
-            (business_name,),
-        )
-        row = cursor.fetchone()
-        if row and row.get("id"):
-            return int(row["id"])
-    return 1
+    return _APPOINTMENTS_BY_NAME_SQL, (config.get_business_name(), appt_date)
+
+
+def _fetch_appointments_by_staff(conn, appt_date: date, config: ConfigLoader) -> dict:
+    """Fetch the day's scheduled appointments grouped by staff name in one pass.
+
+    ``conn`` is an open connection owned by the caller (see ``Database.get_connection``).
+    Rows are streamed with an unbuffered server-side cursor rather than buffered client-side.
+    """
+    sql, params = _appointments_query(config, appt_date)
+    cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        cursor.execute(sql, params)
+        # Rows arrive ordered by staff name, so groupby sees each staff member's run at once.
+        # extend() keeps this correct if collation ever interleaves equal-comparing names.
+        staff_groups = {}
+        appointments = (Appointment(r) for r in cursor)
+        for staff_name, group in groupby(appointments, key=attrgetter("staff_name")):
+            staff_groups.setdefault(staff_name, []).extend(group)
+        return staff_groups
+    finally:
+        cursor.close()
+
+
+# Appointment times sit on a small grid of slots, so each distinct value is formatted once.
+_TIME_LABELS: dict = {}
 
 
 def _format_time(value) -> str:
     if value is None:
         return "TBD"
-    try:
-        return value.strftime("%I:%M %p").lstrip("0")
-    except Exception:
-        return str(value)
+    label = _TIME_LABELS.get(value)
+    if label is None:
+        try:
+            label = value.strftime("%I:%M %p").lstrip("0")
+        except Exception:
+            label = str(value)
+        _TIME_LABELS[value] = label
+    return label
+
+
+_CELL_STYLE = "padding:10px 12px; border-bottom:1px solid #e5e7eb;"
+
+# Compiled once at import; autoescape covers names/phones pulled from the database.
+_EMAIL_ENV = Environment(autoescape=True)
+_EMAIL_ENV.globals["fmt_time"] = _format_time
+_EMAIL_ENV.globals["cell_style"] = _CELL_STYLE
+_EMAIL_TEMPLATE = _EMAIL_ENV.from_string("""
+    <div style="font-family: 'Segoe UI', Arial, Helvetica, sans-serif; color: #1f2937; max-width: 760px; margin: 0 auto; padding: 6px;">
+      <div style="background: linear-gradient(135deg, {{ hero_gradient_start }}, {{ hero_gradient_end }}); color: #ffffff; border-radius: 14px; padding: 20px 22px; box-shadow: 0 10px 22px rgba(15, 23, 42, 0.18);">
+        <div style="font-size: 11px; letter-spacing: 0.12em; text-transform: uppercase; opacity: 0.9;">Daily Staff Schedule • {{ palette_name }}</div>
+        <h2 style="margin: 8px 0 2px 0; font-size: 24px; line-height: 1.2;">{{ business_name }}</h2>
+        <div style="font-size: 15px; opacity: 0.95;">Prepared for <strong>{{ staff_name }}</strong> on {{ date_label }}</div>
+      </div>
+      <div style="margin-top: 12px; background: {{ panel_bg }}; border: 1px solid {{ border }}; border-radius: 10px; padding: 10px 12px; font-size: 14px;">
+        <span style="display:inline-block; background:{{ accent_soft }}; color:#0f172a; border-radius:999px; padding:4px 10px; font-size:12px; margin-right:8px;">{{ staff_name }}</span>
+        <strong>Total appointments today:</strong> <span style="color:{{ accent }};">{{ total_count }}</span>
+      </div>
+    {% if not rows %}
+      <div style="margin-top: 12px; padding: 14px 16px; background:{{ panel_bg }}; border:1px solid {{ border }}; border-radius: 10px;">
+        No appointments scheduled for today.
+      </div>
+    {% else %}
+    <table style="margin-top: 12px; border-collapse: separate; border-spacing: 0; width:100%; font-size: 14px; border:1px solid {{ border }}; border-radius: 10px; overflow: hidden;">
+      <thead>
+        <tr style="background:{{ table_header_bg }}; color:{{ table_header_text }};">
+          <th align="left" style="padding:10px 12px; border-bottom:1px solid {{ border }};">Time</th>
+          <th align="left" style="padding:10px 12px; border-bottom:1px solid {{ border }};">Service</th>
+          <th align="left" style="padding:10px 12px; border-bottom:1px solid {{ border }};">Customer</th>
+          <th align="left" style="padding:10px 12px; border-bottom:1px solid {{ border }};">Phone</th>
+          <th align="left" style="padding:10px 12px; border-bottom:1px solid {{ border }};">Duration</th>
+        </tr>
+      </thead>
+      <tbody>
+        {% for r in rows %}
+        <tr>
+          <td style="{{ cell_style }}">{{ fmt_time(r.appointment_time) }}</td>
+          <td style="{{ cell_style }}">{{ r.service_name or 'Service' }}</td>
+          <td style="{{ cell_style }}">{{ r.customer_name or 'Customer' }}</td>
+          <td style="{{ cell_style }}">{{ r.customer_phone or 'N/A' }}</td>
+          <td style="{{ cell_style }}">{{ r.duration_minutes or 30 }} min</td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+    {% endif %}
+    <div style="margin-top: 16px; font-size: 12px; color: #64748b;">
+      This is an automated schedule summary from Voice Facilitator.
+    </div>
+    </div>
+""")
 
 
 def _get_email_theme(config: ConfigLoader) -> dict:
@@ -133,94 +239,53 @@ def _get_email_theme(config: ConfigLoader) -> dict:
 
 
 def _build_email_html(business_name: str, staff_name: str, appt_date: date, rows: list, theme: dict) -> str:
-    date_label = appt_date.strftime("%A, %B %d, %Y")
-    total_count = len(rows)
-    palette_name = theme.get("palette_name", "Signature")
-    hero_gradient_start = theme.get("hero_gradient_start", "#0f172a")
-    hero_gradient_end = theme.get("hero_gradient_end", "#1d4ed8")
-    accent = theme.get("accent", "#2563eb")
-    accent_soft = theme.get("accent_soft", "#dbeafe")
-    table_header_bg = theme.get("table_header_bg", "#f1f5f9")
-    table_header_text = theme.get("table_header_text", "#0f172a")
-    panel_bg = theme.get("panel_bg", "#f8fafc")
-    border = theme.get("border", "#e2e8f0")
-
-    container_open = f"""
-    <div style="font-family: 'Segoe UI', Arial, Helvetica, sans-serif; color: #1f2937; max-width: 760px; margin: 0 auto; padding: 6px;">
-      <div style="background: linear-gradient(135deg, {hero_gradient_start}, {hero_gradient_end}); color: #ffffff; border-radius: 14px; padding: 20px 22px; box-shadow: 0 10px 22px rgba(15, 23, 42, 0.18);">
-        <div style="font-size: 11px; letter-spacing: 0.12em; text-transform: uppercase; opacity: 0.9;">Daily Staff Schedule • {palette_name}</div>
-        <h2 style="margin: 8px 0 2px 0; font-size: 24px; line-height: 1.2;">{business_name}</h2>
-        <div style="font-size: 15px; opacity: 0.95;">Prepared for <strong>{staff_name}</strong> on {date_label}</div>
-      </div>
-      <div style="margin-top: 12px; background: {panel_bg}; border: 1px solid {border}; border-radius: 10px; padding: 10px 12px; font-size: 14px;">
-        <span style="display:inline-block; background:{accent_soft}; color:#0f172a; border-radius:999px; padding:4px 10px; font-size:12px; margin-right:8px;">{staff_name}</span>
-        <strong>Total appointments today:</strong> <span style="color:{accent};">{total_count}</span>
-      </div>
-    """
-    if not rows:
-        body = f"""
-        <div style="margin-top: 12px; padding: 14px 16px; background:{panel_bg}; border:1px solid {border}; border-radius: 10px;">
-          No appointments scheduled for today.
-        </div>
-        """
-        footer = f"""
-        <div style="margin-top: 16px; font-size: 12px; color: #64748b;">
-          This is an automated schedule summary from Voice Facilitator.
-        </div>
-        """
-        return container_open + body + footer + "</div>"
-
-    table_rows = []
-    for r in rows:
-        table_rows.append(
-            f"""
-            <tr>
-              <td style="padding:10px 12px; border-bottom:1px solid #e5e7eb;">{_format_time(r.get('appointment_time'))}</td>
-              <td style="padding:10px 12px; border-bottom:1px solid #e5e7eb;">{r.get('service_name') or 'Service'}</td>
-              <td style="padding:10px 12px; border-bottom:1px solid #e5e7eb;">{r.get('customer_name') or 'Customer'}</td>
-              <td style="padding:10px 12px; border-bottom:1px solid #e5e7eb;">{r.get('customer_phone') or 'N/A'}</td>
-              <td style="padding:10px 12px; border-bottom:1px solid #e5e7eb;">{r.get('duration_minutes') or 30} min</td>
-            </tr>
-            """
-        )
-    body = f"""
-    <table style="margin-top: 12px; border-collapse: separate; border-spacing: 0; width:100%; font-size: 14px; border:1px solid {border}; border-radius: 10px; overflow: hidden;">
-      <thead>
-        <tr style="background:{table_header_bg}; color:{table_header_text};">
-          <th align="left" style="padding:10px 12px; border-bottom:1px solid {border};">Time</th>
-          <th align="left" style="padding:10px 12px; border-bottom:1px solid {border};">Service</th>
-          <th align="left" style="padding:10px 12px; border-bottom:1px solid {border};">Customer</th>
-          <th align="left" style="padding:10px 12px; border-bottom:1px solid {border};">Phone</th>
-          <th align="left" style="padding:10px 12px; border-bottom:1px solid {border};">Duration</th>
-        </tr>
-      </thead>
-      <tbody>
-        {''.join(table_rows)}
-      </tbody>
-    </table>
-    """
-    footer = """
-    <div style="margin-top: 16px; font-size: 12px; color: #64748b;">
-      This is an automated schedule summary from Voice Facilitator.
-    </div>
-    """
-    return container_open + body + footer + "</div>"
+    """Render one staff email; ``theme`` is the fully merged dict from _get_email_theme."""
+    return _EMAIL_TEMPLATE.render(
+        theme,
+        business_name=business_name,
+        staff_name=staff_name,
+        date_label=appt_date.strftime("%A, %B %d, %Y"),
+        total_count=len(rows),
+        rows=rows,
+    )
 
 
-def _send_email(smtp_host: str, smtp_port: int, smtp_user: str, smtp_password: str,
-                smtp_from: str, to_email: str, subject: str, html_body: str, use_tls: bool):
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"] = smtp_from
-    msg["To"] = to_email
-    msg.attach(MIMEText(html_body, "html"))
+_HTML_ESCAPE = str.maketrans({"<": "&lt;", ">": "&gt;", "&": "&amp;", '"': "&quot;", "'": "&#39;"})
+
+# Stands in for the staff name when the shared "no appointments" email is rendered.
+_STAFF_PLACEHOLDER = "\x00STAFF\x00"
+
+
+def _build_empty_email_template(business_name: str, appt_date: date, theme: dict) -> str:
+    """Render the "no appointments" email once; fill it per staff with _fill_empty_email."""
+    return _build_email_html(business_name, _STAFF_PLACEHOLDER, appt_date, [], theme)
+
 
-    with smtplib.SMTP(smtp_host, smtp_port) as server:
+def _fill_empty_email(template: str, staff_name: str) -> str:
+    return template.replace(_STAFF_PLACEHOLDER, staff_name.translate(_HTML_ESCAPE))
+
+
+def _open_smtp(smtp_host: str, smtp_port: int, smtp_user: str, smtp_password: str, use_tls: bool) -> smtplib.SMTP:
+    server = smtplib.SMTP(smtp_host, smtp_port)
+    try:
         if use_tls:
             server.starttls()
         if smtp_user and smtp_password:
             server.login(smtp_user, smtp_password)
-        server.sendmail(smtp_from, [to_email], msg.as_string())
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def _send_one(server: smtplib.SMTP, smtp_from: str, to_email: str, subject: str, html_body: str):
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = smtp_from
+    msg["To"] = to_email
+    msg.attach(MIMEText(html_body, "html"))
+    server.send_message(msg)
+    server.rset()
 
 
 def main():
@@ -237,13 +302,14 @@ def main():
         sys.exit(1)
 
     config_path = os.getenv("CONFIG_FILE", "config/business_config.yaml")
-    config = ConfigLoader(config_path)
+    config = ConfigLoader.get_or_load(config_path)
     db = Database()
 
     tz_name = _get_timezone(config)
     target_date = _target_date(tz_name)
+    date_iso = target_date.isoformat()
+    date_subject = target_date.strftime("%b %d, %Y")
     business_name = config.get_business_name()
-    business_id = _resolve_business_id(db, config)
     theme = _get_email_theme(config)
     staff_emails = _load_staff_emails(config)
 
@@ -251,31 +317,43 @@ def main():
         print("No staff emails found in config.")
         return
 
-    appointments = _fetch_appointments_for_date(db, target_date, business_id)
-    staff_groups = {}
-    for row in appointments:
-        staff_name = row.get("staff_name") or "Unassigned"
-        staff_groups.setdefault(staff_name, []).append(row)
-
-    for staff_name, email in staff_emails.items():
-        rows = staff_groups.get(staff_name, [])
-        subject = f"{business_name} • {staff_name} • schedule for {target_date.strftime('%b %d, %Y')}"
-        html_body = _build_email_html(business_name, staff_name, target_date, rows, theme)
-        if dry_run:
-            print(f"[DRY_RUN] {business_name} | {staff_name} -> {email}: {len(rows)} appointments ({target_date.isoformat()})")
-            continue
-        _send_email(
-            smtp_host=smtp_host,
-            smtp_port=smtp_port,
-            smtp_user=smtp_user,
-            smtp_password=smtp_password,
-            smtp_from=smtp_from,
-            to_email=email,
-            subject=subject,
-            html_body=html_body,
-            use_tls=use_tls,
-        )
-        print(f"Sent {business_name} | {staff_name} -> {email}: {len(rows)} appointments ({target_date.isoformat()})")
+    # One connection for every query in the run; released before SMTP work starts.
+    with db.get_connection() as conn:
+        staff_groups = _fetch_appointments_by_staff(conn, target_date, config)
+
+    # Split recipients once: booked staff get a full render, the rest share one template.
+    booked = [(name, email) for name, email in staff_emails.items() if name in staff_groups]
+    idle = [(name, email) for name, email in staff_emails.items() if name not in staff_groups]
+    outgoing = [
+        (name, email, staff_groups[name], _build_email_html(business_name, name, target_date, staff_groups[name], theme))
+        for name, email in booked
+    ]
+    if idle:
+        empty_template = _build_empty_email_template(business_name, target_date, theme)
+        outgoing.extend((name, email, [], _fill_empty_email(empty_template, name)) for name, email in idle)
+
+    # One SMTP session (handshake + STARTTLS + AUTH) is reused for every recipient.
+    server = None
+    try:
+        for staff_name, email, rows, html_body in outgoing:
+            subject = f"{business_name} • {staff_name} • schedule for {date_subject}"
+            if dry_run:
+                print(f"[DRY_RUN] {business_name} | {staff_name} -> {email}: {len(rows)} appointments ({date_iso})")
+                continue
+            if server is None:
+                server = _open_smtp(smtp_host, smtp_port, smtp_user, smtp_password, use_tls)
+            try:
+                _send_one(server, smtp_from, email, subject, html_body)
+            except smtplib.SMTPServerDisconnected:
+                server = _open_smtp(smtp_host, smtp_port, smtp_user, smtp_password, use_tls)
+                _send_one(server, smtp_from, email, subject, html_body)
+            print(f"Sent {business_name} | {staff_name} -> {email}: {len(rows)} appointments ({date_iso})")
+    finally:
+        if server is not None:
+            try:
+                server.quit()
+            except smtplib.SMTPException:
+                server.close()
 
 
 if __name__ == "__main__":
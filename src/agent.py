@@ -1,114 +1,58 @@
 """LLM Agent orchestrator - the brain of the voice assistant."""
+import asyncio
+import copy
+from functools import lru_cache
+import hashlib
+from collections import deque
 import json
 import os
-from typing import Dict, Any, List, Optional
-from openai import OpenAI
-from datetime import datetime, date, time
+import orjson
+from typing import Deque, Dict, Any, List, NamedTuple, Optional
+from datetime import datetime, date, time, timedelta
 import re
+import weakref
 from dateutil.tz import gettz
-from src.config import DIALOG_MODEL, APP_TIMEZONE, TRANSLATE_MODEL
+from src.config import (
+    DIALOG_MODEL, APP_TIMEZONE, TRANSLATE_MODEL, AGENT_MAX_HISTORY_TURNS, AGENT_PROMPT_TOKEN_BUDGET,
+    AGENT_SUMMARY_MODEL, SEMANTIC_CACHE_THRESHOLD
+)
 from src.translation import Translator
+from src.openai_client import get_async_client, run_sync
+from src.semantic_cache import SemanticCache
 
+# Resolved once per process; gettz reads and parses tzdata on every call.
+_AGENT_TZ = gettz(APP_TIMEZONE)
 
-class Agent:
-    """LLM-powered agent that orchestrates conversation and decisions."""
-    
-    def __init__(self, api_key: str, config: Any, database: Any, tools: Any):
-        """Initialize agent.
-        
-        Args:
-            api_key: OpenAI API key
-            config: ConfigLoader instance
-            database: Database instance
-            tools: BackendTools instance
-        """
-        self.client = OpenAI(api_key=api_key)
-        self.config = config
-        self.database = database
-        self.tools = tools
-        self.translator = Translator(self.client, TRANSLATE_MODEL)
-        self.last_user_language = "en"
-        
-        self.conversation_history: List[Dict[str, str]] = []
-        self.state: Dict[str, Any] = {
-            'intent': None,
-            'missing_info': [],
-            'collected_info': {},
-            'current_action': None
-        }
-        self.log_context: Dict[str, Any] = {
-            "customer": {},
-            "appointment": {},
-            "call": {},
-            "kpi_event": {}
-        }
-        self.log_requirements: Dict[str, Any] = {
-            "customers": ["phone", "name"],
-            "appointments": [
-                "appointment_date",
-                "appointment_time",
-                "duration_minutes",
-                "service_id_or_name",
-                "staff_id_or_name_or_auto",
-                "customer_phone",
-                "customer_name"
-            ],
-            "calls": ["outcome", "transcript"],
-            "kpi_events": ["event_type", "appointment_date", "appointment_time", "status"]
-        }
-        
-        # Build system prompt from config
-        self.system_prompt = self._build_system_prompt()
-    
-    def _build_system_prompt(self) -> str:
-        """Build system prompt from business configuration."""
-        business_name = self.config.get_business_name()
-        business_type = self.config.get_business_type()
-        services = self.config.get_services()
-        staff = self.config.get_staff()
-        hours = self.config.get_hours()
-        personality = self.config.get_personality()
-        tz = gettz(APP_TIMEZONE)
-        now = datetime.now(tz) if tz else datetime.now()
-        today = now.date()
-        current_day_name = today.strftime("%A")
-        current_date_str = today.isoformat()
-        current_time_str = now.strftime("%H:%M")
-        
-        services_list = "\n".join([
-            f"- {s['name']} ({s.get('duration_minutes', 30)} min, ${s.get('price', 0):.2f})"
-            for s in services
-        ])
-        
-        staff_list = "\n".join([
-            f"- {s['name']}" for s in staff if s.get('available', True)
-        ])
-        
-        hours_list = "\n".join([
-            f"- {day}: {h.get('open', 'Closed')} - {h.get('close', 'Closed')}"
-            for day, h in hours.items()
-        ])
-        
-        tone = personality.get('tone', 'friendly and professional')
-        
-        prompt = f"""You are an AI voice assistant for {business_name}, a {business_type} business.
+_LOG_REQUIREMENTS: Dict[str, Any] = {
+    "customers": ["phone", "name"],
+    "appointments": [
+        "appointment_date",
+        "appointment_time",
+        "duration_minutes",
+        "service_id_or_name",
+        "staff_id_or_name_or_auto",
+        "customer_phone",
+        "customer_name"
+    ],
+    "calls": ["outcome", "transcript"],
+    "kpi_events": ["event_type", "appointment_date", "appointment_time", "status"]
+}
 
-Your role is to act like a real front-desk employee. You are {tone}.
 
-BUSINESS INFORMATION:
-- Business Name: {business_name}
-- Business Type: {business_type}
+class _PromptSection(NamedTuple):
+    name: str
+    content: str
+    priority: int  # higher survives longer under token pressure
+    optional: bool  # only optional sections are ever dropped
 
-SERVICES OFFERED:
-{services_list}
-
-STAFF MEMBERS:
-{staff_list}
-
-BUSINESS HOURS:
-{hours_list}
 
-YOUR CAPABILITIES:
+# Business-independent instructions. Kept first and byte-identical across turns,
+# businesses and days so the provider's automatic prompt-prefix cache can reuse it;
+# everything that varies goes in the [BUSINESS CONTEXT] block appended after it.
+_PROMPT_SECTIONS = (
+    _PromptSection("intro", """You are an AI voice assistant acting as the front desk of the business described under BUSINESS CONTEXT below.
+""", 100, False),
+    _PromptSection("capabilities", """YOUR CAPABILITIES:
 You can help customers with:
 1. Booking appointments
 2. Checking availability
@@ -116,8 +60,8 @@ You can help customers with:
 4. Rescheduling appointments
 5. Listing upcoming appointments
 6. Answering questions about services, staff, and hours
-
-CONVERSATION GUIDELINES:
+""", 40, True),
+    _PromptSection("conversation_guidelines", """CONVERSATION GUIDELINES:
 - Be natural and conversational
 - Remember information from earlier in the conversation
 - Don't repeat questions you've already asked
@@ -136,53 +80,53 @@ CONVERSATION GUIDELINES:
 - DO NOT check availability multiple times for the same request - if availability is confirmed, book it
 - If the customer says "yes", "okay", or confirms, and you have availability, BOOK IT - don't check again
 - If the customer says "haircut and beard trim", treat the service as "Full Service"
-
-LIGHTWEIGHT GUARDRAILS (keep it friendly and flexible):
+""", 80, False),
+    _PromptSection("guardrails", """LIGHTWEIGHT GUARDRAILS (keep it friendly and flexible):
 - If phone number is unclear, too short/long, or missing digits, ask them to repeat it slowly (accept spoken digits like "double two", "oh" = 0)
 - If name is unclear, ask for a quick spelling or last name (but accept a first name if they insist)
 - If date is vague ("sometime next week"), ask for a specific day; if time is vague ("morning"), offer 2-3 options
 - If service is missing, suggest the top 2-3 common services and ask them to pick
 - Always read back the final date/time in clear format and ask for confirmation before booking
 - Do not check availability without a service type unless duration_minutes is explicitly provided
-
-FLOW IMPROVEMENTS:
+""", 20, True),
+    _PromptSection("flow", """FLOW IMPROVEMENTS:
 - Keep turns short and conversational; avoid long speeches
 - Ask only one question at a time
 - Use quick acknowledgements ("Got it", "Perfect") before the next question
 - If the customer agrees to a suggested time ("that works", "sounds good"), treat it as confirmation
 - When presenting options, give 2-3 choices max
 - End with a concise recap and next steps after booking
-
-DATE & TIME UNDERSTANDING:
-- Today is {current_day_name}, {current_date_str}. Current local time: {current_time_str} ({APP_TIMEZONE}). Use this for interpreting "today/tomorrow/next Monday".
+""", 20, True),
+    _PromptSection("date_time", """DATE & TIME UNDERSTANDING:
+- Use the CURRENT DATE & TIME message for interpreting "today/tomorrow/next Monday".
 - Understand natural language: "tomorrow", "this Monday" (upcoming Monday, including today if today is Monday), "next week", "the 28th", "around 10", "in the morning"
 - "this [day]" means the upcoming occurrence of that day (including today if today is that day)
-- Dates without explicit years use the current year ({today.year})
+- Dates without explicit years use the current year
 - Parse dates and times from conversational speech
 - When speaking times to customers, use 12-hour format like "4:30 PM" (not "16:30")
 - If ambiguous, ask once, then make a reasonable assumption
-
-RESPONSE FORMAT:
+""", 100, False),
+    _PromptSection("response_format", """RESPONSE FORMAT:
 You must respond in JSON format with this structure:
-{{
+{
     "response": "What to say to the customer (natural, conversational)",
     "action": "action_name or null",
-    "action_params": {{"param": "value"}} or null,
-    "state_update": {{"key": "value"}} or null,
-    "log_update": {{"key": "value"}} or null,
+    "action_params": {"param": "value"} or null,
+    "state_update": {"key": "value"} or null,
+    "log_update": {"key": "value"} or null,
     "conversation_complete": false
-}}
-
-LOGGING REQUIREMENTS (match DB schema):
-{json.dumps(self.log_requirements, indent=2)}
+}
+""", 100, False),
+    _PromptSection("logging", """LOGGING REQUIREMENTS (match DB schema):
+""" + json.dumps(_LOG_REQUIREMENTS, indent=2) + """
 - Maintain a log_context dictionary with keys: customer, appointment, call, kpi_event.
 - Before calling an action, ensure all required fields for that action are present in log_context.
 - If any required fields are missing, ask ONE concise question to collect them, then update log_context via log_update.
 - Only ask when necessary to proceed with a database action.
-
-AVAILABLE ACTIONS:
+""", 90, False),
+    _PromptSection("actions", """AVAILABLE ACTIONS:
 - "check_availability": Check available time slots (params: date, service_id? or service?, staff_id?, duration_minutes?)
-  Returns: {{date, day_name, available_slots (array), count, is_closed (boolean), message (string if closed)}}
+  Returns: {date, day_name, available_slots (array), count, is_closed (boolean), message (string if closed)}
   CRITICAL: If is_closed is true, you MUST immediately inform the customer clearly using the message field.
   Do NOT check availability again for the same closed day. Instead, suggest alternative days (Monday-Saturday).
   If count is 0 and is_closed is false, inform the customer no slots are available and suggest other times.
@@ -201,8 +145,8 @@ AVAILABLE ACTIONS:
 - "get_services": Get list of services (no params)
 - "get_staff": Get list of staff (no params)
 - null: No action needed, just conversation
-
-IMPORTANT BOOKING RULES:
+""", 100, False),
+    _PromptSection("booking_rules", """IMPORTANT BOOKING RULES:
 - Always check availability BEFORE booking
 - If check_availability returns is_closed=true, DO NOT attempt to book. Instead, inform the customer and suggest alternative days.
 - If check_availability returns count=0 and is_closed=false, inform the customer the time slot is not available and suggest alternatives.
@@ -214,8 +158,8 @@ IMPORTANT BOOKING RULES:
 - For rescheduling, never cancel first: call reschedule_appointment to book the new slot and then cancel the old one once the new booking succeeds
 - Remember: Checking availability is just to verify - the goal is to BOOK the appointment
 - CRITICAL: The system prevents double-booking. If book_appointment returns an error saying the slot is unavailable, inform the customer and suggest alternative times from the available_slots in the error response.
-
-IMPORTANT:
+""", 90, False),
+    _PromptSection("important", """IMPORTANT:
 - Only return valid JSON
 - The "response" field is what you'll say to the customer
 - Use actions to interact with the backend
@@ -225,12 +169,453 @@ IMPORTANT:
 - When an action returns is_closed=true, you MUST inform the customer immediately and suggest alternatives
 - Do NOT repeatedly check availability for the same closed day - suggest different days instead
 - Be proactive: if the customer wants a day that's closed, suggest the next available day
+""", 100, False),
+)
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+@lru_cache(maxsize=32)
+def _compose_prompt(token_budget: Optional[int] = None) -> str:
+    """Join the static sections, dropping optional ones (lowest priority first) to fit
+    token_budget. Kept sections stay in their original order; None keeps everything."""
+    if token_budget is None:
+        return "\n".join(section.content for section in _PROMPT_SECTIONS)
+    remaining = token_budget - sum(
+        _estimate_tokens(section.content) for section in _PROMPT_SECTIONS if not section.optional
+    )
+    keep = set()
+    for section in sorted(_PROMPT_SECTIONS, key=lambda sec: -sec.priority):
+        if not section.optional:
+            keep.add(section.name)
+            continue
+        cost = _estimate_tokens(section.content)
+        if cost <= remaining:
+            keep.add(section.name)
+            remaining -= cost
+    return "\n".join(section.content for section in _PROMPT_SECTIONS if section.name in keep)
+
+
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+# Common date/time phrasings resolved locally and handed to the model as a hint.
+_DT_RE = re.compile(
+    r"\b(today|tomorrow|next\s+(?:mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:r(?:s(?:day)?)?)?"
+    r"|fri(?:day)?|sat(?:urday)?|sun(?:day)?)\b|\d{1,2}(?::\d{2})?\s*[ap]\.?m\.?)(?!\w)",
+    re.IGNORECASE,
+)
+_TIME_TOKEN_RE = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*([ap])", re.IGNORECASE)
+_BOOKING_INTENT_RE = re.compile(
+    r"\b(book|schedule|appointment|reschedule|availab\w*|open(?:ing)?s?|slots?|come in)\b", re.IGNORECASE
+)
+# Utterances that move or correct a slot; a single parsed date/time could be the wrong one.
+_DT_AMBIGUOUS_RE = re.compile(r"\bfrom\b.*\bto\b|\b(?:instead|not|change)\b", re.IGNORECASE)
+# "the day after tomorrow" / "after next Monday": the date phrase is only an anchor.
+_DT_AFTER_RE = re.compile(r"\bafter\s+$", re.IGNORECASE)
+_WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Decision fields carrying no information; omitted from the stored history turns.
+_EMPTY_FIELD_VALUES = (None, False, "", [], {})
+
+# Only side-effect-free decisions are reused; bookings/cancellations always hit the model.
+_CACHEABLE_ACTIONS = {None, "get_services", "get_staff", "check_availability"}
+_DIALOG_CACHE = SemanticCache(threshold=SEMANTIC_CACHE_THRESHOLD)
+
+# ConfigLoader -> (loaded config dict, business prompt); reused by every Agent on that config.
+_BUSINESS_PROMPT_CACHE: "weakref.WeakKeyDictionary[Any, tuple]" = weakref.WeakKeyDictionary()
+
+
+class _ResponseFieldStreamer:
+    """Incrementally decode the top-level "response" string from streamed JSON chunks."""
+
+    def __init__(self):
+        self._buf = ""
+        self._pos: Optional[int] = None
+        self.done = False
+        # Scanner state for locating the field: nesting depth, string state, and the
+        # last top-level string seen (a candidate key) and whether its ':' followed.
+        self._scan = 0
+        self._depth = 0
+        self._in_str = False
+        self._str_start = 0
+        self._key: Optional[str] = None
+        self._after_key = False
+
+    def _find_field(self) -> bool:
+        """Advance the scanner; True once the top-level "response" string value starts."""
+        buf = self._buf
+        i = self._scan
+        while i < len(buf):
+            c = buf[i]
+            if self._in_str:
+                if c == "\\":
+                    if i + 1 >= len(buf):
+                        break
+                    i += 2
+                    continue
+                if c == '"':
+                    self._in_str = False
+                    if self._depth == 1:
+                        self._key = buf[self._str_start:i]
+                i += 1
+                continue
+            if c == '"':
+                if self._after_key and self._depth == 1:
+                    self._pos = i + 1
+                    return True
+                self._in_str = True
+                self._str_start = i + 1
+                self._key = None
+                self._after_key = False
+            elif c == ":":
+                self._after_key = self._key == "response"
+                self._key = None
+            elif not c.isspace():
+                if c in "{[":
+                    self._depth += 1
+                elif c in "}]":
+                    self._depth -= 1
+                self._key = None
+                self._after_key = False
+            i += 1
+        self._scan = i
+        return False
+
+    def feed(self, chunk: str) -> str:
+        """Append a chunk and return any newly decoded response text."""
+        self._buf += chunk
+        if self.done:
+            return ""
+        if self._pos is None and not self._find_field():
+            return ""
+        buf = self._buf
+        i = self._pos
+        out = []
+        while i < len(buf):
+            c = buf[i]
+            if c == "\\":
+                if i + 1 >= len(buf):
+                    break
+                esc = buf[i + 1]
+                if esc == "u":
+                    if i + 6 > len(buf):
+                        break
+                    try:
+                        code = int(buf[i + 2:i + 6], 16)
+                        if 0xD800 <= code < 0xDC00:
+                            # Surrogate pair: wait for the low half, then let json decode both.
+                            if i + 12 > len(buf):
+                                break
+                            out.append(orjson.loads(f'"{buf[i:i + 12]}"'))
+                            i += 12
+                        else:
+                            out.append(chr(code))
+                            i += 6
+                    except ValueError:
+                        # Malformed escape; the full parse at stream end rejects it anyway.
+                        out.append(buf[i:i + 6])
+                        i += 6
+                    continue
+                out.append(_JSON_ESCAPES.get(esc, esc))
+                i += 2
+                continue
+            if c == '"':
+                self.done = True
+                i += 1
+                break
+            out.append(c)
+            i += 1
+        self._pos = i
+        return "".join(out)
+
+
+class Agent:
+    """LLM-powered agent that orchestrates conversation and decisions."""
+    
+    # action -> ((param keys, (log group, log key) fallbacks, label), ...); a requirement
+    # is met when any of its params or log_context fallbacks is set.
+    _REQUIRED_FIELDS = {
+        "book_appointment": (
+            (("date",), (("appointment", "appointment_date"),), "date"),
+            (("time",), (("appointment", "appointment_time"),), "time"),
+            (
+                ("service_id", "service", "service_name"),
+                (("appointment", "service"), ("appointment", "service_id")),
+                "service",
+            ),
+            (("customer_phone",), (("customer", "phone"),), "phone number"),
+            (("customer_name",), (("customer", "name"),), "name"),
+        ),
+        "cancel_appointment": (
+            (("appointment_id", "customer_phone"), (("appointment", "id"), ("customer", "phone")), "booking"),
+        ),
+        "reschedule_appointment": (
+            (("appointment_id", "customer_phone"), (("appointment", "id"), ("customer", "phone")), "booking"),
+        ),
+        "get_customer_appointments": (
+            (("customer_phone",), (("customer", "phone"),), "phone number"),
+        ),
+    }
+    _MISSING_PROMPTS = {
+        "book_appointment": "To book the appointment, I still need your {missing}.",
+        "cancel_appointment": "Could you provide the appointment ID or the phone number on the booking?",
+        "reschedule_appointment": "Could you provide the appointment ID or the phone number on the booking?",
+        "get_customer_appointments": "Could I have the phone number on the booking?",
+    }
+    
+    def __init__(self, api_key: str, config: Any, database: Any, tools: Any):
+        """Initialize agent.
+        
+        Args:
+            api_key: OpenAI API key
+            config: ConfigLoader instance
+            database: Database instance
+            tools: BackendTools instance
+        """
+        self.api_key = api_key
+        self.config = config
+        self.database = database
+        self.tools = tools
+        self.translator = Translator(TRANSLATE_MODEL, api_key)
+        self.last_user_language = "en"
+        
+        # Bounded so per-turn prompt size stops growing on long calls.
+        self.conversation_history: Deque[Dict[str, str]] = deque(maxlen=2 * AGENT_MAX_HISTORY_TURNS)
+        # Turns pushed out of the window, folded into state['summary'] in the background.
+        self._evicted_turns: List[Dict[str, str]] = []
+        self._summary_task: Optional[asyncio.Task] = None
+        self.state: Dict[str, Any] = {
+            'intent': None,
+            'missing_info': [],
+            'collected_info': {},
+            'current_action': None
+        }
+        self.log_context: Dict[str, Any] = {
+            "customer": {},
+            "appointment": {},
+            "call": {},
+            "kpi_event": {}
+        }
+        # Serialized log_context, re-dumped only after a log_update touches it.
+        self._log_context_json = ""
+        self._log_context_dirty = True
+        self.log_requirements: Dict[str, Any] = copy.deepcopy(_LOG_REQUIREMENTS)
+        
+        # Build system prompt from config
+        self.system_prompt = self._build_system_prompt()
+    
+    @property
+    def client(self):
+        """Pooled AsyncOpenAI client shared by every agent on the running loop."""
+        return get_async_client(self.api_key)
+    
+    def _build_system_prompt(self, token_budget: Optional[int] = None) -> str:
+        """Build the system prompt from business configuration.
+        
+        Deliberately time-independent so it stays a byte-stable, cacheable prefix;
+        the date/time and log context are sent after the history instead. With a
+        token_budget, optional instruction sections are dropped to fit it.
+        """
+        business = self._business_prompt()
+        if token_budget is not None:
+            # Coarse steps keep the composed prompt (and its prefix cache) stable across turns.
+            token_budget = (token_budget - _estimate_tokens(business)) // 256 * 256
+        return f"{_compose_prompt(token_budget)}\n{business}"
+    
+    def _business_prompt(self) -> str:
+        """Business context block, cached per loaded config."""
+        snapshot = getattr(self.config, "config", None)
+        try:
+            cached = _BUSINESS_PROMPT_CACHE.get(self.config)
+        except TypeError:
+            cached = None
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+        
+        business_name = self.config.get_business_name()
+        business_type = self.config.get_business_type()
+        services = self.config.get_services()
+        staff = self.config.get_staff()
+        hours = self.config.get_hours()
+        personality = self.config.get_personality()
+        
+        services_list = "\n".join(
+            f"- {s['name']} ({s.get('duration_minutes', 30)} min, ${s.get('price', 0):.2f})"
+            for s in services
+        )
+        
+        staff_list = "\n".join(f"- {s['name']}" for s in staff if s.get('available', True))
+        
+        hours_list = "\n".join(
+            f"- {day}: {h.get('open', 'Closed')} - {h.get('close', 'Closed')}"
+            for day, h in hours.items()
+        )
+        
+        tone = personality.get('tone', 'friendly and professional')
+        
+        prompt = f"""[BUSINESS CONTEXT]
+You are the AI voice assistant for {business_name}, a {business_type} business.
+Act like a real front-desk employee. You are {tone}.
+
+BUSINESS INFORMATION:
+- Business Name: {business_name}
+- Business Type: {business_type}
+
+SERVICES OFFERED:
+{services_list}
+
+STAFF MEMBERS:
+{staff_list}
+
+BUSINESS HOURS:
+{hours_list}
 """
+        try:
+            _BUSINESS_PROMPT_CACHE[self.config] = (snapshot, prompt)
+        except TypeError:
+            pass
         return prompt
     
-    def process(self, user_input: str, internal_prompt: bool = False) -> Dict[str, Any]:
+    def _append_history(self, message: Dict[str, str]):
+        """Append a turn, keeping whatever the bounded window pushes out for summarizing."""
+        history = self.conversation_history
+        if history and len(history) == history.maxlen:
+            self._evicted_turns.append(history[0])
+        history.append(message)
+    
+    def _maybe_start_summary(self):
+        """Fold evicted turns into the running summary off the response path."""
+        if not self._evicted_turns or (self._summary_task is not None and not self._summary_task.done()):
+            return
+        turns, self._evicted_turns = self._evicted_turns, []
+        self._summary_task = asyncio.create_task(self._summarize_turns(turns))
+    
+    async def _summarize_turns(self, turns: List[Dict[str, str]]):
+        # reset() swaps in a fresh state dict; a result arriving after that belongs
+        # to the previous call and is dropped.
+        state = self.state
+        previous = state.get('summary') or ""
+        transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+        try:
+            response = await self.client.chat.completions.create(
+                model=AGENT_SUMMARY_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            "Update the running summary of a front-desk phone call. Keep every "
+                            "confirmed detail (names, phone numbers, services, dates, times, "
+                            "appointment IDs, what was booked/cancelled) and open questions. "
+                            "Plain text, at most 120 words."
+                        ),
+                    },
+                    {"role": "user", "content": f"CURRENT SUMMARY:\n{previous}\n\nEARLIER TURNS:\n{transcript}"},
+                ],
+                temperature=0,
+            )
+            if self.state is state:
+                state['summary'] = response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"Agent summary error: {e}")
+            # Retry with these turns next time rather than losing them.
+            if self.state is state:
+                self._evicted_turns[:0] = turns
+    
+    def _log_context_dump(self) -> str:
+        """Compact JSON of log_context, cached until the next log_update."""
+        if self._log_context_dirty:
+            self._log_context_json = orjson.dumps(self.log_context, default=str).decode()
+            self._log_context_dirty = False
+        return self._log_context_json
+    
+    def _check_missing(self, action: Optional[str], params: Dict[str, Any]) -> List[str]:
+        """Labels of required fields for action found in neither params nor log_context."""
+        missing = []
+        for param_keys, log_keys, label in self._REQUIRED_FIELDS.get(action, ()):
+            if any(params.get(k) for k in param_keys):
+                continue
+            if any(
+                isinstance(self.log_context.get(group), dict) and self.log_context[group].get(key)
+                for group, key in log_keys
+            ):
+                continue
+            missing.append(label)
+        return missing
+    
+    @staticmethod
+    def _fast_parse_datetime(text: str) -> Dict[str, str]:
+        """Resolve "today"/"tomorrow"/"next <weekday>"/"3pm"-style phrases without the model.
+        
+        Uses the same "next <weekday>" rule as BackendTools._parse_date (the upcoming
+        occurrence, never today). Returns ISO appointment_date/appointment_time when found,
+        and nothing when the utterance has several dates or times or reads as a change
+        ("from ... to ...", "not ...", "instead").
+        """
+        parsed: Dict[str, str] = {}
+        if not text or _DT_AMBIGUOUS_RE.search(text):
+            return parsed
+        matches = list(_DT_RE.finditer(text))
+        times = sum(1 for m in matches if m.group(1)[0].isdigit())
+        if times > 1 or len(matches) - times > 1:
+            return parsed
+        for match in matches:
+            token = match.group(1).lower()
+            if token[0].isdigit():
+                t = _TIME_TOKEN_RE.match(token)
+                hour, minute = int(t.group(1)), int(t.group(2) or 0)
+                if not (1 <= hour <= 12 and minute < 60):
+                    continue
+                hour = hour % 12 + (12 if t.group(3).lower() == "p" else 0)
+                parsed["appointment_time"] = time(hour, minute).strftime("%H:%M")
+            elif not _DT_AFTER_RE.search(text, 0, match.start()):
+                today = datetime.now(_AGENT_TZ).date() if _AGENT_TZ else date.today()
+                if token == "today":
+                    day = today
+                elif token == "tomorrow":
+                    day = today + timedelta(days=1)
+                else:
+                    days_ahead = _WEEKDAYS.index(token.split()[-1][:3]) - today.weekday()
+                    day = today + timedelta(days=days_ahead if days_ahead > 0 else days_ahead + 7)
+                parsed["appointment_date"] = day.isoformat()
+        return parsed
+    
+    @staticmethod
+    def _datetime_context() -> str:
+        """Current date/time block; rebuilt per turn so long calls stay accurate."""
+        now = datetime.now(_AGENT_TZ) if _AGENT_TZ else datetime.now()
+        today = now.date()
+        return f"""CURRENT DATE & TIME:
+- Today is {today.strftime("%A")}, {today.isoformat()}. Current local time: {now.strftime("%H:%M")} ({APP_TIMEZONE}).
+- The current year is {today.year}.
+"""
+    
+    def process(
+        self,
+        user_input: str,
+        internal_prompt: bool = False,
+    ) -> Dict[str, Any]:
         """Process user input and return agent decision.
         
+        Synchronous wrapper around aprocess() for callers outside an event loop.
+        
+        Args:
+            user_input: Transcribed user speech
+            internal_prompt: True when caller passes internal orchestration text
+            
+        Returns:
+            Agent decision with response, action, and state
+        """
+        return run_sync(self.aprocess(user_input, internal_prompt))
+    
+    async def aprocess(
+        self,
+        user_input: str,
+        internal_prompt: bool = False,
+    ) -> Dict[str, Any]:
+        """Process user input without blocking the running event loop.
+        
         Args:
             user_input: Transcribed user speech
             internal_prompt: True when caller passes internal orchestration text
@@ -240,38 +625,126 @@ IMPORTANT:
         """
         # Detect language and translate to English for user-originated input.
         # Internal orchestration prompts must not overwrite the user's language.
+        translated_input = user_input
         if not internal_prompt:
-            detected_lang = self.translator.detect_language(user_input)
+            detect_task = asyncio.create_task(self.translator.detect_language(user_input))
+            # A caller already speaking another language usually keeps doing so, so the
+            # translation into English is started alongside detection rather than after it.
+            speculative_task = None
+            if self.last_user_language != "en":
+                speculative_task = asyncio.create_task(self.translator.translate(user_input, "en"))
+            detected_lang = await detect_task
             self.last_user_language = detected_lang or "en"
-        translated_input = user_input
-        if not internal_prompt and self.last_user_language != "en":
-            translated_input = self.translator.translate(user_input, "en")
+            if self.last_user_language == "en":
+                if speculative_task is not None:
+                    speculative_task.cancel()
+            elif speculative_task is not None:
+                translated_input = await speculative_task
+            else:
+                translated_input = await self.translator.translate(user_input, "en")
 
         # Add user input to history
-        self.conversation_history.append({
+        self._append_history({
             "role": "user",
             "content": translated_input
         })
         
-        # Build messages for API
+        # Clear-cut booking dates/times are resolved here and offered to the model as a
+        # hint only; log_context is left to the model's own log_update.
+        hint = None
+        if not internal_prompt and _BOOKING_INTENT_RE.search(translated_input):
+            parsed_dt = self._fast_parse_datetime(translated_input)
+            if parsed_dt:
+                hint = "HINT: locally parsed from the caller's last message: " + ", ".join(
+                    f"{k}={v}" for k, v in parsed_dt.items()
+                ) + "."
+        
+        # Long calls trade optional prompt sections for history within the token budget.
+        history_tokens = sum(_estimate_tokens(m["content"]) for m in self.conversation_history)
+        if history_tokens + _estimate_tokens(self.system_prompt) > AGENT_PROMPT_TOKEN_BUDGET:
+            system_prompt = self._build_system_prompt(AGENT_PROMPT_TOKEN_BUDGET - history_tokens)
+        else:
+            system_prompt = self._build_system_prompt()
+        
+        # Build messages for API. Stable parts first (system prompt, then the bounded
+        # history window) so the provider's prefix cache covers them; per-turn context last.
+        log_context_json = self._log_context_dump()
+        summary = self.state.get('summary')
         messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "system", "content": f"CURRENT_LOG_CONTEXT: {json.dumps(self.log_context, ensure_ascii=False)}"},
-            *self.conversation_history
+            {"role": "system", "content": system_prompt},
+            *([{"role": "system", "content": f"PRIOR_SUMMARY: {summary}"}] if summary else []),
+            *self.conversation_history,
+            {"role": "system", "content": self._datetime_context()},
+            {"role": "system", "content": f"CURRENT_LOG_CONTEXT: {log_context_json}"}
         ]
+        if hint:
+            messages.append({"role": "system", "content": hint})
+        
+        # Cached decisions are scoped to everything besides the utterance that shapes the
+        # answer: prompt, today's date, the previous assistant turn and the log context.
+        previous_turn = self.conversation_history[-2]["content"] if len(self.conversation_history) > 1 else ""
+        cache_scope = hashlib.sha1("\x1f".join((
+            system_prompt,
+            summary or "",
+            datetime.now(_AGENT_TZ).date().isoformat(),
+            previous_turn,
+            log_context_json,
+        )).encode("utf-8")).hexdigest()
         
         # Get agent response
+        raw_content = None
+        early_translate = None
+        early_text = None
         try:
-            response = self.client.chat.completions.create(
-                model=DIALOG_MODEL,
-                messages=messages,
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
+            cached_content = await _DIALOG_CACHE.get(cache_scope, translated_input)
+            if cached_content is not None:
+                raw_content = cached_content
+            elif self.last_user_language != "en":
+                # Streamed so non-English replies start translating as soon as the
+                # "response" field closes.
+                stream = await self.client.chat.completions.create(
+                    model=DIALOG_MODEL,
+                    messages=messages,
+                    temperature=0.7,
+                    response_format={"type": "json_object"},
+                    stream=True
+                )
+                streamer = _ResponseFieldStreamer()
+                parts = []
+                response_parts = []
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    if streamer.done:
+                        continue
+                    piece = streamer.feed(delta)
+                    if piece:
+                        response_parts.append(piece)
+                    if streamer.done:
+                        early_text = "".join(response_parts)
+                        early_translate = asyncio.create_task(
+                            self.translator.translate(early_text, self.last_user_language)
+                        )
+                raw_content = "".join(parts)
+            else:
+                response = await self.client.chat.completions.create(
+                    model=DIALOG_MODEL,
+                    messages=messages,
+                    temperature=0.7,
+                    response_format={"type": "json_object"}
+                )
+                raw_content = response.choices[0].message.content
             
-            agent_response = json.loads(response.choices[0].message.content)
+            agent_response = orjson.loads(raw_content)
+            if cached_content is None and agent_response.get("action") in _CACHEABLE_ACTIONS:
+                await _DIALOG_CACHE.put(cache_scope, translated_input, raw_content)
 
             if agent_response.get('log_update'):
+                self._log_context_dirty = True
                 try:
                     for k, v in agent_response.get('log_update', {}).items():
                         if isinstance(self.log_context.get(k), dict) and isinstance(v, dict):
@@ -284,77 +757,47 @@ IMPORTANT:
             action = agent_response.get("action")
             action_params = agent_response.get("action_params") or {}
 
-            def _get_log_value(group: str, key: str):
-                if isinstance(self.log_context.get(group), dict):
-                    return self.log_context[group].get(key)
-                return None
-
-            if action == "book_appointment":
-                missing = []
-                if not (action_params.get("date") or _get_log_value("appointment", "appointment_date")):
-                    missing.append("date")
-                if not (action_params.get("time") or _get_log_value("appointment", "appointment_time")):
-                    missing.append("time")
-                if not (
-                    action_params.get("service_id")
-                    or action_params.get("service")
-                    or action_params.get("service_name")
-                    or _get_log_value("appointment", "service")
-                    or _get_log_value("appointment", "service_id")
-                ):
-                    missing.append("service")
-                if not (action_params.get("customer_phone") or _get_log_value("customer", "phone")):
-                    missing.append("phone number")
-                if not (action_params.get("customer_name") or _get_log_value("customer", "name")):
-                    missing.append("name")
-                if missing:
-                    agent_response["action"] = None
-                    agent_response["action_params"] = None
-                    agent_response["response"] = (
-                        "To book the appointment, I still need your "
-                        + ", ".join(missing)
-                        + "."
-                    )
-            elif action in {"cancel_appointment", "reschedule_appointment"}:
-                has_id = bool(action_params.get("appointment_id") or _get_log_value("appointment", "id"))
-                has_phone = bool(action_params.get("customer_phone") or _get_log_value("customer", "phone"))
-                if not (has_id or has_phone):
-                    agent_response["action"] = None
-                    agent_response["action_params"] = None
-                    agent_response["response"] = (
-                        "Could you provide the appointment ID or the phone number on the booking?"
-                    )
-            elif action == "get_customer_appointments":
-                if not (action_params.get("customer_phone") or _get_log_value("customer", "phone")):
-                    agent_response["action"] = None
-                    agent_response["action_params"] = None
-                    agent_response["response"] = "Could I have the phone number on the booking?"
+            missing = self._check_missing(action, action_params)
+            if missing:
+                agent_response["action"] = None
+                agent_response["action_params"] = None
+                agent_response["response"] = self._MISSING_PROMPTS[action].format(missing=", ".join(missing))
 
             response_text = agent_response.get("response", "")
-            translated_response = response_text
-            if self.last_user_language != "en":
-                translated_response = self.translator.translate(response_text, self.last_user_language)
+            # Output translation runs while history/state bookkeeping happens below.
+            translate_task = None
+            if early_translate is not None and response_text == early_text:
+                translate_task = early_translate
+            elif self.last_user_language != "en":
+                if early_translate is not None:
+                    early_translate.cancel()
+                translate_task = asyncio.create_task(
+                    self.translator.translate(response_text, self.last_user_language)
+                )
             
-            # Add assistant response to history
-            history_response = dict(agent_response)
+            # Add assistant response to history. Null/false/empty fields are dropped since
+            # every stored turn is re-sent on each later request; "response" always stays.
+            history_response = {k: v for k, v in agent_response.items() if v not in _EMPTY_FIELD_VALUES}
             history_response["response"] = response_text
-            self.conversation_history.append({
+            self._append_history({
                 "role": "assistant",
-                "content": json.dumps(history_response)
+                "content": orjson.dumps(history_response).decode()
             })
             
             # Update state
             if agent_response.get('state_update'):
                 self.state.update(agent_response['state_update'])
+            self._maybe_start_summary()
             
-            agent_response["response"] = translated_response
+            agent_response["response"] = await translate_task if translate_task else response_text
             return agent_response
         
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
+            if early_translate is not None:
+                early_translate.cancel()
             print(f"Agent JSON decode error: {e}")
             # Try to extract text response even if JSON is malformed
             try:
-                raw_content = response.choices[0].message.content
                 # Fallback: use raw content as response
                 return {
                     "response": raw_content if raw_content else "I'm sorry, I'm having trouble processing that.",
@@ -372,6 +815,8 @@ IMPORTANT:
                     "conversation_complete": False
                 }
         except Exception as e:
+            if early_translate is not None:
+                early_translate.cancel()
             print(f"Agent error: {e}")
             return {
                 "response": "I'm sorry, I'm having trouble processing that. Could you repeat?",
@@ -393,6 +838,14 @@ IMPORTANT:
         """
         return self.tools.execute(action, action_params)
     
+    async def aexecute_action(self, action: str, action_params: Dict[str, Any]) -> Any:
+        """Async counterpart of execute_action.
+        
+        Backend tools make blocking MySQL calls, so they run in a worker thread
+        to keep the caller's event loop serving audio frames meanwhile.
+        """
+        return await asyncio.to_thread(self.execute_action, action, action_params)
+    
     def get_greeting(self) -> str:
         """Get initial greeting from config."""
         personality = self.config.get_personality()
@@ -404,10 +857,17 @@ IMPORTANT:
     
     def reset(self):
         """Reset conversation state."""
-        self.conversation_history = []
+        # New state first: an in-flight summary compares against it and then discards its
+        # result, so nothing from the old call leaks into the lists reset below.
         self.state = {
             'intent': None,
             'missing_info': [],
             'collected_info': {},
             'current_action': None
         }
+        self.conversation_history = deque(maxlen=2 * AGENT_MAX_HISTORY_TURNS)
+        self._evicted_turns = []
+        if self._summary_task is not None:
+            # reset() is called from sync code; the task lives on the agent's event loop.
+            self._summary_task.get_loop().call_soon_threadsafe(self._summary_task.cancel)
+            self._summary_task = None
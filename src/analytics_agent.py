@@ -1,12 +1,23 @@
 """LLM-powered analytics agent: NL -> SQL -> natural summary."""
-import json
+import hashlib
+import orjson
+import re
+from itertools import islice
 from typing import Any, Dict, List
-from openai import OpenAI
 from pathlib import Path
-from src.config import OPENAI_API_KEY, DIALOG_MODEL
+from src.config import OPENAI_API_KEY, DIALOG_MODEL, SEMANTIC_CACHE_THRESHOLD
+from src.openai_client import get_async_client
+from src.semantic_cache import SemanticCache
 
 SCHEMA_PATH = Path("schema_docs/analytics_schema.md")
 
+_SELECT_PREFIX_RE = re.compile(r"^\s*select\b", re.IGNORECASE)
+_BANNED_SQL_RE = re.compile(
+    r"\b(?:insert|update|delete|alter|drop|truncate|create|grant|revoke|attach|pragma)\b",
+    re.IGNORECASE,
+)
+_SENSITIVE_COLUMNS = frozenset({"phone", "email", "mobile", "sms", "mail"})
+
 
 def _load_schema() -> str:
     if SCHEMA_PATH.exists():
@@ -14,18 +25,21 @@ def _load_schema() -> str:
     return ""
 
 
+# Shared across agents so repeat questions from any admin session skip the model.
+_SQL_CACHE = SemanticCache(threshold=SEMANTIC_CACHE_THRESHOLD)
+
+
 class AnalyticsAgent:
     def __init__(self):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
         self.schema = _load_schema()
+        self._cache_scope = hashlib.sha1(self.schema.encode("utf-8")).hexdigest()
 
-    def generate_sql(self, question: str) -> Dict[str, Any]:
-        """Generate SELECT SQL for the given question.
+    @property
+    def client(self):
+        return get_async_client(OPENAI_API_KEY)
 
-        Returns a dict with keys: sql, reasoning, needs_clarification, clarification_question.
-        Errors return an error field.
-        """
-        system_prompt = f"""
+    def _sql_system_prompt(self) -> str:
+        return f"""
 You convert business questions to safe, read-only SQL.
 Rules:
 - SELECT only. Absolutely no INSERT/UPDATE/DELETE/ALTER/DROP/TRUNCATE/CREATE.
@@ -36,58 +50,131 @@ Rules:
 - If clarification is needed, set needs_clarification=true, provide clarification_question, and leave sql empty.
 - If unsure, default to counting (COUNT(*)) rather than returning raw rows.
 """
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": question}
-        ]
+
+    def _sql_request_body(self, question: str) -> Dict[str, Any]:
+        return {
+            "model": DIALOG_MODEL,
+            "messages": [
+                {"role": "system", "content": self._sql_system_prompt()},
+                {"role": "user", "content": question}
+            ],
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+        }
+
+    @staticmethod
+    def _check_sql_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the clarification / SELECT-only rules to a model payload."""
+        if payload.get("needs_clarification"):
+            return {
+                "needs_clarification": True,
+                "clarification_question": payload.get("clarification_question", ""),
+                "sql": ""
+            }
+        sql = payload.get("sql", "")
+        if not _SELECT_PREFIX_RE.match(sql):
+            return {"error": "Generated SQL is not SELECT", "sql": sql}
+        if _BANNED_SQL_RE.search(sql):
+            return {"error": "Unsafe SQL detected", "sql": sql}
+        return payload
+
+    async def generate_sql(self, question: str) -> Dict[str, Any]:
+        """Generate SELECT SQL for the given question.
+
+        Returns a dict with keys: sql, reasoning, needs_clarification, clarification_question.
+        Errors return an error field.
+        """
+        cached = await _SQL_CACHE.get(self._cache_scope, question)
+        if cached is not None:
+            return dict(cached)
         try:
-            resp = self.client.chat.completions.create(
-                model=DIALOG_MODEL,
-                messages=messages,
-                temperature=0,
-                response_format={"type": "json_object"}
-            )
-            payload = json.loads(resp.choices[0].message.content)
-            if payload.get("needs_clarification"):
-                return {
-                    "needs_clarification": True,
-                    "clarification_question": payload.get("clarification_question", ""),
-                    "sql": ""
-                }
-            sql = payload.get("sql", "")
-            if not sql.lower().strip().startswith("select"):
-                return {"error": "Generated SQL is not SELECT", "sql": sql}
-            banned = ["insert", "update", "delete", "alter", "drop", "truncate", "create"]
-            if any(word in sql.lower() for word in banned):
-                return {"error": "Unsafe SQL detected", "sql": sql}
-            return payload
+            resp = await self.client.chat.completions.create(**self._sql_request_body(question))
+            payload = orjson.loads(resp.choices[0].message.content)
+            checked = self._check_sql_payload(payload)
+            if checked is payload:
+                await _SQL_CACHE.put(self._cache_scope, question, dict(payload))
+            return checked
         except Exception as e:
             return {"error": str(e)}
 
-    def summarize(self, question: str, rows: List[Dict[str, Any]], meta: Dict[str, Any]) -> str:
+    async def submit_batch(self, questions: List[str]) -> str:
+        """Queue questions for SQL generation through the Batch API (24h window, half price).
+
+        For nightly reports and other latency-insensitive work; interactive
+        questions should keep using generate_sql. Each question's custom_id is
+        "q-<index>". Returns the batch id to pass to poll_batch.
+        """
+        lines = b"\n".join(
+            orjson.dumps({
+                "custom_id": f"q-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._sql_request_body(question),
+            })
+            for i, question in enumerate(questions)
+        )
+        upload = await self.client.files.create(file=("analytics_batch.jsonl", lines), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    async def poll_batch(self, batch_id: str) -> Dict[str, Any]:
+        """Check a submitted batch.
+
+        Returns {"status": ...} until it completes, then also "results":
+        custom_id -> the same dict generate_sql would return for that question.
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status != "completed" or not batch.output_file_id:
+            return {"status": batch.status}
+        content = await self.client.files.content(batch.output_file_id)
+        results: Dict[str, Dict[str, Any]] = {}
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            try:
+                if item.get("error"):
+                    raise ValueError(item["error"].get("message", "batch request failed"))
+                body = item["response"]["body"]
+                results[item["custom_id"]] = self._check_sql_payload(
+                    orjson.loads(body["choices"][0]["message"]["content"])
+                )
+            except Exception as e:
+                results[item.get("custom_id", "")] = {"error": str(e)}
+        return {"status": batch.status, "results": results}
+
+    async def summarize(self, question: str, rows: List[Dict[str, Any]], meta: Dict[str, Any]) -> str:
         """Summarize SQL result for voice/text output."""
-        # Redact phone/email
-        safe_rows = []
-        for r in rows[:200]:
-            safe = {}
-            for k, v in r.items():
-                if v is None:
-                    safe[k] = v
-                elif isinstance(v, str) and ("@" in v or k.lower() in ("phone", "email")):
-                    safe[k] = "[redacted]"
-                else:
-                    safe[k] = v
-            safe_rows.append(safe)
+        # Redact phone/email: sensitive columns wholesale, others only when a value looks like an email
+        sensitive_cols = {k for k in rows[0] if k.lower() in _SENSITIVE_COLUMNS} if rows else set()
+        safe_rows = [
+            {
+                k: (
+                    "[redacted]"
+                    if v is not None and (k in sensitive_cols or (isinstance(v, str) and "@" in v))
+                    else v
+                )
+                for k, v in r.items()
+            }
+            for r in islice(rows, 200)
+        ]
         system_prompt = """
 You summarize analytics query results concisely for an admin. Respond in plain text without leading numbering. Mention totals/percentages briefly. Avoid PII; if data was redacted, don't guess it.
 """
-        user_content = json.dumps({"question": question, "rows": safe_rows, "meta": meta})
+        # default=str covers the Decimal/date values MySQL rows carry
+        user_content = orjson.dumps(
+            {"question": question, "rows": safe_rows, "meta": meta}, default=str
+        ).decode()
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_content}
         ]
         try:
-            resp = self.client.chat.completions.create(
+            resp = await self.client.chat.completions.create(
                 model=DIALOG_MODEL,
                 messages=messages,
                 temperature=0.2
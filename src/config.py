@@ -21,9 +21,10 @@ RECORD_MAX_SECONDS = float(os.getenv("RECORD_MAX_SECONDS", "15"))  # hard cap pe
 FRAME_DURATION_SEC = float(os.getenv("FRAME_DURATION_SEC", "0.03"))  # 30ms frames
 SILENCE_DURATION_SEC = float(os.getenv("SILENCE_DURATION_SEC", "1.0"))  # stop after 1s trailing silence
 
-# Energy thresholds (these are "base" bounds; STT calibrates per call)
-ENERGY_FLOOR = float(os.getenv("ENERGY_FLOOR", "0.010"))  # minimum start threshold
-ENERGY_CEIL = float(os.getenv("ENERGY_CEIL", "0.050"))  # maximum start threshold
+# Energy thresholds on frame RMS (these are "base" bounds; STT calibrates per call).
+# Overrides written for the old mean-|x| metric need scaling by ~1.25 (see CHANGES.md).
+ENERGY_FLOOR = float(os.getenv("ENERGY_FLOOR", "0.0125"))  # minimum start threshold
+ENERGY_CEIL = float(os.getenv("ENERGY_CEIL", "0.0625"))  # maximum start threshold
 STOP_THRESHOLD_RATIO = float(os.getenv("STOP_THRESHOLD_RATIO", "0.70"))  # stop threshold = start_thresh * ratio
 
 # Models
@@ -31,6 +32,19 @@ STT_MODEL = os.getenv("STT_MODEL", "whisper-1")
 TTS_MODEL = os.getenv("TTS_MODEL", "tts-1")
 DIALOG_MODEL = os.getenv("DIALOG_MODEL", "gpt-4o")
 TRANSLATE_MODEL = os.getenv("TRANSLATE_MODEL", DIALOG_MODEL)
+AGENT_SUMMARY_MODEL = os.getenv("AGENT_SUMMARY_MODEL", "gpt-4o-mini")  # summarizes turns dropped from history
+
+# Dialog history kept per call (user+assistant pairs); older turns are dropped
+AGENT_MAX_HISTORY_TURNS = int(os.getenv("AGENT_MAX_HISTORY_TURNS", "12"))
+
+# Approximate token budget for system prompt + history; above it, optional prompt
+# sections (capabilities list, guardrail/flow prose) are dropped
+AGENT_PROMPT_TOKEN_BUDGET = int(os.getenv("AGENT_PROMPT_TOKEN_BUDGET", "4000"))
+
+# LLM response cache: exact repeats are always reused; set a cosine threshold
+# (e.g. 0.92) to also match paraphrases via embeddings
+_semantic_threshold = os.getenv("SEMANTIC_CACHE_THRESHOLD", "").strip()
+SEMANTIC_CACHE_THRESHOLD = float(_semantic_threshold) if _semantic_threshold else None
 
 # Optional STT language hint (leave blank for auto-detect)
 STT_LANGUAGE = os.getenv("STT_LANGUAGE", "").strip()
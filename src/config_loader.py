@@ -1,13 +1,25 @@
 """Configuration loader for business-specific settings."""
 import yaml
+import orjson
 import os
+import tempfile
+import threading
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
 
 class ConfigLoader:
     """Loads and validates business configuration from YAML file."""
     
+    # Resolved path -> loader shared by every caller of get_or_load().
+    _instances: Dict[Path, "ConfigLoader"] = {}
+    _lock = threading.RLock()
+    
     def __init__(self, config_path: str):
         """Initialize config loader.
         
@@ -16,19 +28,86 @@ class ConfigLoader:
         """
         self.config_path = Path(config_path)
         self.config: Optional[Dict[str, Any]] = None
+        self._flat: Dict[str, Any] = {}
+        self._sig: Optional[tuple] = None
         self.load()
     
+    @classmethod
+    def get_or_load(cls, config_path: str) -> "ConfigLoader":
+        """Return the shared loader for config_path, reloading it if the file changed."""
+        path = Path(config_path).resolve()
+        with cls._lock:
+            loader = cls._instances.get(path)
+            if loader is None:
+                loader = cls(path)
+                cls._instances[path] = loader
+            else:
+                st = path.stat()
+                if loader._sig != (st.st_mtime_ns, st.st_size):
+                    loader.load()
+            return loader
+    
     def load(self) -> Dict[str, Any]:
         """Load configuration from file."""
         if not self.config_path.exists():
             raise FileNotFoundError(f"Config file not found: {self.config_path}")
         
-        with open(self.config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
-        
-        self._validate()
+        st = self.config_path.stat()
+        sig = (st.st_mtime_ns, st.st_size)
+        self._sig = sig
+        cache_path = self.config_path.with_suffix(".cache.json")
+        self.config = self._read_cache(cache_path, sig)
+        if self.config is None:
+            with open(self.config_path, 'r') as f:
+                self.config = yaml.load(f, Loader=SafeLoader)
+            self._validate()
+            self._write_cache(cache_path, sig)
+        else:
+            self._validate()
+        self._flat = {}
+        self._flatten("", self.config)
         return self.config
     
+    @staticmethod
+    def _read_cache(cache_path: Path, sig: tuple) -> Optional[Dict[str, Any]]:
+        """Return the cached config if it was written for this exact file version."""
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = orjson.loads(f.read())
+            config = cached["config"]
+        except Exception:
+            return None
+        return config if cached.get("sig") == list(sig) and isinstance(config, dict) else None
+    
+    def _write_cache(self, cache_path: Path, sig: tuple):
+        """Atomically store the parsed config next to the YAML as JSON; best effort.
+        
+        Skipped when the config doesn't survive a JSON round trip (non-string keys,
+        YAML dates) so a cached load always matches a fresh parse.
+        """
+        try:
+            data = orjson.dumps({"sig": list(sig), "config": self.config})
+            if orjson.loads(data)["config"] != self.config:
+                return
+            fd, tmp = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, cache_path)
+            except Exception:
+                os.unlink(tmp)
+                raise
+        except Exception:
+            pass
+    
+    def _flatten(self, prefix: str, node: Dict[str, Any]):
+        """Index every value (nested dicts included) under its dot-notation key."""
+        for k, v in node.items():
+            path = f"{prefix}.{k}" if prefix else str(k)
+            self._flat[path] = v
+            if isinstance(v, dict):
+                self._flatten(path, v)
+    
     def _validate(self):
         """Validate required configuration sections."""
         required_sections = ['business', 'services', 'staff', 'hours']
@@ -38,14 +117,17 @@ class ConfigLoader:
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value by dot-notation key (e.g., 'business.name')."""
-        keys = key.split('.')
-        value = self.config
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        return value
+        return self._flat.get(key, default)
+    
+    def set(self, key: str, value: Any):
+        """Set a value by dot-notation key, creating parent sections, and refresh the index."""
+        *parents, leaf = key.split(".")
+        node = self.config
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+        self._flat = {}
+        self._flatten("", self.config)
     
     def get_business_name(self) -> str:
         """Get business name."""
@@ -1,17 +1,225 @@
 """Database layer for MySQL persistence."""
+import asyncio
 import logging
+import numpy as np
 import pymysql
+from pymysql.constants import CLIENT
 import os
-from typing import Dict, Any, List, Optional
+import threading
+import time as _time
+from typing import Dict, Any, Iterator, List, Optional, Union
 from datetime import datetime, date, time, timedelta
 from contextlib import contextmanager
+from dbutils.pooled_db import PooledDB
+
+try:
+    from numba import njit
+except ImportError:  # optional; slot sweeps fall back to numpy broadcasting
+    njit = None
 
 logger = logging.getLogger(__name__)
 
 
+def _td_to_min(value) -> int:
+    """Minute of day for a MySQL TIME value (pymysql returns timedelta) or a time."""
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) // 60
+    return value.hour * 60 + value.minute
+
+
+def _td_to_time(value) -> Optional[time]:
+    """MySQL TIME value (timedelta) as a time; time and None pass through."""
+    if isinstance(value, timedelta):
+        minutes = _td_to_min(value)
+        return time(minutes // 60, minutes % 60)
+    return value
+
+
+# Hot statements are built once at import. pymysql interpolates parameters client-side
+# (it has no server-side prepare), so this is the part of "preparing" done in Python.
+_CUSTOMER_BY_PHONE_SQL = "SELECT * FROM customers WHERE phone = %s"
+
+_BUSINESS_HOURS_SQL = """
+    SELECT day_of_week, open_time, close_time, is_closed
+    FROM business_hours
+    WHERE business_id = %s
+"""
+
+# Business hours change rarely; cached per business and re-read after this many seconds.
+_HOURS_CACHE_TTL = 300
+
+# Longest appointment the conflict check has to account for. Bounding appointment_time from
+# below by (start - this) lets the check range-scan idx_date_staff_status_time instead of
+# reading every scheduled row for the day; create_appointment rejects anything longer.
+MAX_SERVICE_HOURS = 8
+
+# Conflict check and insert in one statement; the EXCLUDING variant skips the appointment
+# being rescheduled.
+_BOOK_APPOINTMENT_TEMPLATE = """
+    INSERT INTO appointments 
+    (business_id, customer_id, staff_id, service_id, appointment_date, 
+     appointment_time, duration_minutes, notes, status)
+    SELECT %s, %s, %s, %s, %s, %s, %s, %s, 'scheduled'
+    FROM DUAL
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM appointments
+        WHERE appointment_date = %s 
+          AND status = 'scheduled'
+          AND (
+            (staff_id = %s OR (%s IS NULL AND staff_id IS NULL))
+            OR staff_id IS NULL
+            OR %s IS NULL
+          )
+          AND appointment_time >= %s
+          AND appointment_time < %s
+          AND ADDTIME(appointment_time, SEC_TO_TIME(duration_minutes * 60)) > %s
+          {exclude}
+    )
+"""
+_BOOK_APPOINTMENT_SQL = _BOOK_APPOINTMENT_TEMPLATE.format(exclude="")
+_BOOK_APPOINTMENT_EXCLUDING_SQL = _BOOK_APPOINTMENT_TEMPLATE.format(exclude="AND id != %s")
+
+# ER_LOCK_DEADLOCK / ER_LOCK_WAIT_TIMEOUT: two bookings raced for the same free range.
+_LOCK_CONFLICT_ERRORS = (1213, 1205)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _free_mask(slot_start, slot_end, apt_start, apt_end):
+        """True for each slot that overlaps none of the appointments."""
+        out = np.ones(slot_start.size, np.bool_)
+        for i in range(slot_start.size):
+            for j in range(apt_start.size):
+                if not (slot_end[i] <= apt_start[j] or slot_start[i] >= apt_end[j]):
+                    out[i] = False
+                    break
+        return out
+else:
+    def _free_mask(slot_start, slot_end, apt_start, apt_end):
+        """True for each slot that overlaps none of the appointments."""
+        return ((slot_end[:, None] <= apt_start) | (slot_start[:, None] >= apt_end)).all(axis=1)
+
+
+# Every CREATE TABLE, in foreign-key order; sent as one multi-statement batch.
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS businesses (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    type VARCHAR(100),
+    phone VARCHAR(50),
+    timezone VARCHAR(100),
+    address VARCHAR(255),
+    website VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS customers (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    phone VARCHAR(50) UNIQUE,
+    name VARCHAR(255),
+    email VARCHAR(255),
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS services (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    business_id INT,
+    name VARCHAR(255) NOT NULL,
+    duration_minutes INT NOT NULL,
+    price DECIMAL(10, 2),
+    active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS staff (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    business_id INT,
+    name VARCHAR(255) NOT NULL,
+    available BOOLEAN DEFAULT TRUE,
+    email VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS business_hours (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    business_id INT,
+    day_of_week INT NOT NULL,  -- 0=Monday, 6=Sunday
+    open_time TIME,
+    close_time TIME,
+    is_closed BOOLEAN DEFAULT FALSE,
+    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE,
+    UNIQUE KEY unique_day (business_id, day_of_week)
+);
+
+CREATE TABLE IF NOT EXISTS appointments (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    business_id INT,
+    customer_id INT,
+    staff_id INT,
+    service_id INT,
+    appointment_date DATE NOT NULL,
+    appointment_time TIME NOT NULL,
+    duration_minutes INT NOT NULL,
+    status VARCHAR(50) DEFAULT 'scheduled',  -- scheduled, completed, cancelled, no_show
+    notes TEXT,
+    google_event_id VARCHAR(255) NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE,
+    FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE SET NULL,
+    FOREIGN KEY (staff_id) REFERENCES staff(id) ON DELETE SET NULL,
+    FOREIGN KEY (service_id) REFERENCES services(id) ON DELETE SET NULL,
+    INDEX idx_date_time (appointment_date, appointment_time),
+    INDEX idx_date_staff_status_time (appointment_date, staff_id, status, appointment_time),
+    INDEX idx_customer (customer_id),
+    INDEX idx_staff (staff_id),
+    INDEX idx_google_event (google_event_id)
+);
+
+CREATE TABLE IF NOT EXISTS calls (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    business_id INT,
+    customer_id INT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ended_at TIMESTAMP NULL,
+    outcome VARCHAR(255),  -- booked, cancelled, inquiry, etc.
+    transcript TEXT,
+    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE,
+    FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS kpi_events (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    appointment_id INT,
+    event_type VARCHAR(50), -- booked, cancelled, reschedule_new, reschedule_cancel_old
+    service_id INT NULL,
+    service_name VARCHAR(255),
+    service_price DECIMAL(10,2) NULL,
+    staff_id INT NULL,
+    staff_name VARCHAR(255),
+    duration_minutes INT,
+    status VARCHAR(50),
+    appointment_date DATE,
+    appointment_time TIME,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (appointment_id) REFERENCES appointments(id) ON DELETE SET NULL
+);
+"""
+
+
 class Database:
     """MySQL database connection and schema management."""
     
+    # (host, port, user, database) -> pool shared by every Database instance in the process
+    _pools: Dict[tuple, PooledDB] = {}
+    _pool_lock = threading.Lock()
+    
     def __init__(self):
         """Initialize database connection from environment variables."""
         self.host = os.getenv('DB_HOST', os.getenv('MYSQL_HOST', 'localhost'))
@@ -20,10 +228,54 @@ class Database:
         self.password = os.getenv('DB_PASSWORD', os.getenv('MYSQL_PASSWORD', ''))
         self.database = os.getenv('DB_NAME', os.getenv('MYSQL_DATABASE', 'voice_assistant'))
         self._connection = None
+        # business_id -> (loaded at, {day_of_week: hours dict})
+        self._hours_by_dow: Dict[int, tuple] = {}
+    
+    def _get_pool(self) -> PooledDB:
+        """Return the process-wide connection pool for these settings, creating it once."""
+        key = (self.host, self.port, self.user, self.database)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._pool_lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = PooledDB(
+                        creator=pymysql,
+                        mincached=5,
+                        maxcached=20,
+                        maxconnections=50,
+                        blocking=True,
+                        host=self.host,
+                        port=self.port,
+                        user=self.user,
+                        password=self.password,
+                        database=self.database,
+                        charset='utf8mb4',
+                        cursorclass=pymysql.cursors.DictCursor
+                    )
+                    self._pools[key] = pool
+        return pool
     
     @contextmanager
     def get_connection(self):
-        """Get database connection context manager."""
+        """Get database connection context manager.
+        
+        Connections come from a shared pool; close() hands them back (rolling back
+        anything left uncommitted) instead of tearing down the socket.
+        """
+        conn = self._get_pool().connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def multi_statement_connection(self):
+        """Unpooled connection that accepts several ;-separated statements per execute().
+        
+        Used for schema setup and bulk config sync; MULTI_STATEMENTS is never enabled on
+        pooled connections, which run request-path queries.
+        """
         conn = pymysql.connect(
             host=self.host,
             port=self.port,
@@ -31,72 +283,35 @@ class Database:
             password=self.password,
             database=self.database,
             charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
+            cursorclass=pymysql.cursors.DictCursor,
+            client_flag=CLIENT.MULTI_STATEMENTS
         )
         try:
             yield conn
         finally:
             conn.close()
     
+    def iter_rows(self, query: str, params=None) -> Iterator[Dict[str, Any]]:
+        """Run a SELECT on an unbuffered cursor and yield rows as MySQL sends them.
+        
+        The pooled connection stays checked out until the generator is exhausted or closed.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+            try:
+                cursor.execute(query, params)
+                yield from cursor
+            finally:
+                cursor.close()
+    
     def initialize_schema(self):
         """Create database schema if it doesn't exist."""
-        with self.get_connection() as conn:
+        with self.multi_statement_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute(SCHEMA_SQL)
+            while cursor.nextset():
+                pass
             
-            # Businesses table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS businesses (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    type VARCHAR(100),
-                    phone VARCHAR(50),
-                    timezone VARCHAR(100),
-                    address VARCHAR(255),
-                    website VARCHAR(255),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Customers table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS customers (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    phone VARCHAR(50) UNIQUE,
-                    name VARCHAR(255),
-                    email VARCHAR(255),
-                    notes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Services table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS services (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    business_id INT,
-                    name VARCHAR(255) NOT NULL,
-                    duration_minutes INT NOT NULL,
-                    price DECIMAL(10, 2),
-                    active BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
-                )
-            """)
-            
-            # Staff table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS staff (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    business_id INT,
-                    name VARCHAR(255) NOT NULL,
-                    available BOOLEAN DEFAULT TRUE,
-                    email VARCHAR(255),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
-                )
-            """)
             # Best-effort column additions for existing tables
             try:
                 cursor.execute("ALTER TABLE businesses ADD COLUMN IF NOT EXISTS timezone VARCHAR(100)")
@@ -121,59 +336,27 @@ class Database:
                 except Exception:
                     pass
             
-            # Business hours table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS business_hours (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    business_id INT,
-                    day_of_week INT NOT NULL,  -- 0=Monday, 6=Sunday
-                    open_time TIME,
-                    close_time TIME,
-                    is_closed BOOLEAN DEFAULT FALSE,
-                    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE,
-                    UNIQUE KEY unique_day (business_id, day_of_week)
-                )
-            """)
+            try:
+                cursor.execute("ALTER TABLE appointments ADD COLUMN IF NOT EXISTS google_event_id VARCHAR(255) NULL")
+            except Exception:
+                try:
+                    cursor.execute("ALTER TABLE appointments ADD COLUMN google_event_id VARCHAR(255) NULL")
+                except Exception:
+                    pass
+            try:
+                cursor.execute("CREATE INDEX idx_google_event ON appointments (google_event_id)")
+            except Exception:
+                pass
             
-            # Appointments table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS appointments (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    business_id INT,
-                    customer_id INT,
-                    staff_id INT,
-                    service_id INT,
-                    appointment_date DATE NOT NULL,
-                    appointment_time TIME NOT NULL,
-                    duration_minutes INT NOT NULL,
-                    status VARCHAR(50) DEFAULT 'scheduled',  -- scheduled, completed, cancelled, no_show
-                    notes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE,
-                    FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE SET NULL,
-                    FOREIGN KEY (staff_id) REFERENCES staff(id) ON DELETE SET NULL,
-                    FOREIGN KEY (service_id) REFERENCES services(id) ON DELETE SET NULL,
-                    INDEX idx_date_time (appointment_date, appointment_time),
-                    INDEX idx_customer (customer_id),
-                    INDEX idx_staff (staff_id)
-                )
-            """)
+            # Booking conflict-check index for existing tables (best effort; errors if present)
+            try:
+                cursor.execute("""
+                    CREATE INDEX idx_date_staff_status_time
+                    ON appointments (appointment_date, staff_id, status, appointment_time)
+                """)
+            except Exception:
+                pass
             
-            # Calls/Conversations table (optional but encouraged)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS calls (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    business_id INT,
-                    customer_id INT,
-                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    ended_at TIMESTAMP NULL,
-                    outcome VARCHAR(255),  -- booked, cancelled, inquiry, etc.
-                    transcript TEXT,
-                    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE,
-                    FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE SET NULL
-                )
-            """)
             # Add appointment_id link if missing (best effort)
             try:
                 cursor.execute("""
@@ -192,26 +375,6 @@ class Database:
                 except Exception:
                     pass
             
-            # KPI events table (captures snapshots for analytics)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS kpi_events (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    appointment_id INT,
-                    event_type VARCHAR(50), -- booked, cancelled, reschedule_new, reschedule_cancel_old
-                    service_id INT NULL,
-                    service_name VARCHAR(255),
-                    service_price DECIMAL(10,2) NULL,
-                    staff_id INT NULL,
-                    staff_name VARCHAR(255),
-                    duration_minutes INT,
-                    status VARCHAR(50),
-                    appointment_date DATE,
-                    appointment_time TIME,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (appointment_id) REFERENCES appointments(id) ON DELETE SET NULL
-                )
-            """)
-            
             conn.commit()
 
     def create_call(self, business_id: int = 1, customer_id: Optional[int] = None) -> int:
@@ -255,39 +418,31 @@ class Database:
             conn.commit()
     
     def get_business_hours_for_date(self, day: date, business_id: int = 1) -> Optional[Dict[str, Any]]:
-        """Return business hours for a given date (from DB)."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            day_of_week = day.weekday()  # 0=Monday, 6=Sunday
-            cursor.execute("""
-                SELECT open_time, close_time, is_closed
-                FROM business_hours
-                WHERE business_id = %s AND day_of_week = %s
-            """, (business_id, day_of_week))
-            hours = cursor.fetchone()
-            if not hours:
-                return None
-
-            open_time = hours['open_time']
-            close_time = hours['close_time']
-
-            if isinstance(open_time, timedelta):
-                total_seconds = int(open_time.total_seconds())
-                hours_part = total_seconds // 3600
-                minutes_part = (total_seconds % 3600) // 60
-                open_time = time(hours_part, minutes_part)
-
-            if isinstance(close_time, timedelta):
-                total_seconds = int(close_time.total_seconds())
-                hours_part = total_seconds // 3600
-                minutes_part = (total_seconds % 3600) // 60
-                close_time = time(hours_part, minutes_part)
-
-            return {
-                "open_time": open_time,
-                "close_time": close_time,
-                "is_closed": bool(hours.get("is_closed"))
-            }
+        """Return business hours for a given date (from DB, cached for _HOURS_CACHE_TTL)."""
+        cached = self._hours_by_dow.get(business_id)
+        if cached is None or _time.monotonic() - cached[0] > _HOURS_CACHE_TTL:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(_BUSINESS_HOURS_SQL, (business_id,))
+                by_dow = {
+                    row['day_of_week']: {  # 0=Monday, 6=Sunday
+                        "open_time": _td_to_time(row['open_time']),
+                        "close_time": _td_to_time(row['close_time']),
+                        "is_closed": bool(row.get("is_closed"))
+                    }
+                    for row in cursor.fetchall()
+                }
+            cached = (_time.monotonic(), by_dow)
+            self._hours_by_dow[business_id] = cached
+        hours = cached[1].get(day.weekday())
+        return dict(hours) if hours else None
+    
+    def invalidate_hours_cache(self, business_id: Optional[int] = None) -> None:
+        """Drop cached business hours (all businesses by default) after an admin edit."""
+        if business_id is None:
+            self._hours_by_dow.clear()
+        else:
+            self._hours_by_dow.pop(business_id, None)
 
     def get_available_slots(self, date: date, staff_id: Optional[int] = None,
                            duration_minutes: int = 30,
@@ -306,25 +461,34 @@ class Database:
             List of available time slots
         """
         logger.info(f"Getting available slots for {date}, staff_id={staff_id}, duration={duration_minutes}min")
+        hours = self.get_business_hours_for_date(date, business_id=business_id)
+        if not hours or hours.get("is_closed"):
+            logger.warning(f"Business is closed on {date}")
+            return []  # Return empty list - caller should check if business is closed
+
+        open_time = hours["open_time"]
+        close_time = hours["close_time"]
+        logger.info(f"Business hours: {open_time} - {close_time}")
+        
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            hours = self.get_business_hours_for_date(date, business_id=business_id)
-            if not hours or hours.get("is_closed"):
-                logger.warning(f"Business is closed on {date}")
-                return []  # Return empty list - caller should check if business is closed
-
-            open_time = hours["open_time"]
-            close_time = hours["close_time"]
-            logger.info(f"Business hours: {open_time} - {close_time}")
+            # Tuple rows: only two int columns are read, so skip the per-row dict.
+            cursor = conn.cursor(pymysql.cursors.Cursor)
             
-            # Get existing appointments
+            # Get existing appointments that touch opening hours (start minute computed in MySQL)
+            open_min = _td_to_min(open_time)
+            close_min = _td_to_min(close_time)
             query = """
-                SELECT appointment_time, duration_minutes
+                SELECT TIME_TO_SEC(appointment_time) DIV 60 AS start_min, duration_minutes
                 FROM appointments
                 WHERE business_id = %s AND appointment_date = %s AND status = 'scheduled'
+                  AND appointment_time < %s
+                  AND ADDTIME(appointment_time, SEC_TO_TIME(duration_minutes * 60)) > %s
             """
-            params = [business_id, date]
+            params = [
+                business_id, date,
+                timedelta(minutes=close_min + buffer_minutes),
+                timedelta(minutes=open_min - buffer_minutes),
+            ]
             
             if staff_id:
                 query += " AND staff_id = %s"
@@ -337,43 +501,26 @@ class Database:
             appointments = cursor.fetchall()
             logger.info(f"Found {len(appointments)} existing appointments")
             
-            # Calculate available slots
-            slots = []
-            current = datetime.combine(date, open_time)
-            end_time = datetime.combine(date, close_time)
-            logger.debug(f"Checking slots from {current} to {end_time}")
+            # Calculate available slots: every 15 minutes from opening, as minute-of-day
+            # ints, free when the slot clears every (buffered) appointment.
+            if not appointments:
+                minutes = range(open_min, close_min - duration_minutes + 1, 15)
+            else:
+                slot_start = np.arange(open_min, close_min - duration_minutes + 1, 15, dtype=np.int32)
+                slot_end = slot_start + duration_minutes
+                apt_start, apt_duration = np.array(appointments, dtype=np.int32).T
+                apt_end = apt_start + apt_duration
+                if buffer_minutes:
+                    apt_start = apt_start - buffer_minutes
+                    apt_end += buffer_minutes
+                free = _free_mask(slot_start, slot_end, apt_start, apt_end)
+                minutes = slot_start[free].tolist()
             
-            while current + timedelta(minutes=duration_minutes) <= end_time:
-                slot_end = current + timedelta(minutes=duration_minutes)
-                slot_available = True
-                
-                # Check for conflicts
-                for apt in appointments:
-                    apt_time = apt['appointment_time']
-                    # Convert timedelta to time if needed
-                    if isinstance(apt_time, timedelta):
-                        total_seconds = int(apt_time.total_seconds())
-                        hours_part = total_seconds // 3600
-                        minutes_part = (total_seconds % 3600) // 60
-                        apt_time = time(hours_part, minutes_part)
-                    apt_start = datetime.combine(date, apt_time)
-                    apt_end = apt_start + timedelta(minutes=apt['duration_minutes'])
-                    if buffer_minutes:
-                        apt_start = apt_start - timedelta(minutes=buffer_minutes)
-                        apt_end = apt_end + timedelta(minutes=buffer_minutes)
-                    
-                    if not (slot_end <= apt_start or current >= apt_end):
-                        slot_available = False
-                        break
-                
-                if slot_available:
-                    slots.append({
-                        'time': current.time(),
-                        'datetime': current
-                    })
-                
-                # Move to next 15-minute slot
-                current += timedelta(minutes=15)
+            midnight = datetime.combine(date, time())
+            slots = [
+                {'time': time(minute // 60, minute % 60), 'datetime': midnight + timedelta(minutes=minute)}
+                for minute in minutes
+            ]
             
             logger.info(f"Found {len(slots)} available slots")
             return slots
@@ -394,77 +541,62 @@ class Database:
             Appointment ID
             
         Raises:
-            ValueError: If the time slot is already booked
+            ValueError: If the time slot is already booked or the duration exceeds MAX_SERVICE_HOURS
         """
+        if duration_minutes > MAX_SERVICE_HOURS * 60:
+            raise ValueError(
+                f"Appointments longer than {MAX_SERVICE_HOURS} hours cannot be booked."
+            )
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # CRITICAL: Check for overlapping appointments before inserting
-            # Calculate appointment end time
-            appointment_start = datetime.combine(appointment_date, appointment_time)
-            appointment_end = appointment_start + timedelta(minutes=duration_minutes)
-            
-            # Check for conflicts with existing appointments
-            conflict_query = """
-                SELECT id, appointment_time, duration_minutes
-                FROM appointments
-                WHERE appointment_date = %s 
-                  AND status = 'scheduled'
-                  AND (
-                    (staff_id = %s OR (%s IS NULL AND staff_id IS NULL))
-                    OR staff_id IS NULL
-                    OR %s IS NULL
-                  )
-            """
-            cursor.execute(conflict_query, (
+            # CRITICAL: The overlap check and the insert are one statement, and the transaction
+            # is forced to REPEATABLE READ so InnoDB next-key locks the range the NOT EXISTS
+            # scans (under READ COMMITTED it would not, and two callers could both insert).
+            # Two callers racing for the same empty range then deadlock; the loser retries
+            # once and sees the winner's row.
+            start_min = appointment_time.hour * 60 + appointment_time.minute
+            params: List[Any] = [
+                business_id, customer_id, staff_id, service_id,
+                appointment_date, appointment_time, duration_minutes, notes,
                 appointment_date,
                 staff_id, staff_id,  # Check same staff or both null
-                staff_id
-            ))
-            existing_appointments = cursor.fetchall()
+                staff_id,
+                timedelta(minutes=max(0, start_min - buffer_minutes - MAX_SERVICE_HOURS * 60)),
+                timedelta(minutes=start_min + duration_minutes + buffer_minutes),
+                timedelta(minutes=start_min - buffer_minutes),
+            ]
+            insert_query = _BOOK_APPOINTMENT_SQL
             if exclude_appointment_id:
-                existing_appointments = [
-                    apt for apt in existing_appointments
-                    if apt.get("id") != exclude_appointment_id
-                ]
-            
-            # Check for time overlaps
-            for existing in existing_appointments:
-                existing_time = existing['appointment_time']
-                # Convert timedelta to time if needed
-                if isinstance(existing_time, timedelta):
-                    total_seconds = int(existing_time.total_seconds())
-                    hours_part = total_seconds // 3600
-                    minutes_part = (total_seconds % 3600) // 60
-                    existing_time = time(hours_part, minutes_part)
-                
-                existing_start = datetime.combine(appointment_date, existing_time)
-                existing_end = existing_start + timedelta(minutes=existing['duration_minutes'])
-                if buffer_minutes:
-                    existing_start = existing_start - timedelta(minutes=buffer_minutes)
-                    existing_end = existing_end + timedelta(minutes=buffer_minutes)
-                
-                # Check if appointments overlap
-                if not (appointment_end <= existing_start or appointment_start >= existing_end):
-                    logger.error(
-                        f"Appointment conflict detected: "
-                        f"Requested {appointment_start} to {appointment_end} "
-                        f"overlaps with existing appointment {existing['id']} "
-                        f"({existing_start} to {existing_end})"
-                    )
-                    raise ValueError(
-                        f"Time slot is already booked. The requested time ({appointment_time.strftime('%H:%M')}) "
-                        f"conflicts with an existing appointment."
-                    )
-            
-            # No conflicts - proceed with booking
-            cursor.execute("""
-                INSERT INTO appointments 
-                (business_id, customer_id, staff_id, service_id, appointment_date, 
-                 appointment_time, duration_minutes, notes, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'scheduled')
-            """, (business_id, customer_id, staff_id, service_id, 
-                  appointment_date, appointment_time, duration_minutes, notes))
+                insert_query = _BOOK_APPOINTMENT_EXCLUDING_SQL
+                params.append(exclude_appointment_id)
+            for attempt in range(2):
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                conn.begin()
+                try:
+                    cursor.execute(insert_query, params)
+                    break
+                except pymysql.err.OperationalError as e:
+                    conn.rollback()
+                    if e.args[0] not in _LOCK_CONFLICT_ERRORS:
+                        raise
+                    logger.warning(f"Booking lock conflict on {appointment_date} {appointment_time}: {e}")
+                    if attempt:
+                        raise ValueError(
+                            f"Time slot is already booked. The requested time "
+                            f"({appointment_time.strftime('%H:%M')}) is being booked by another caller."
+                        ) from e
+            if cursor.rowcount == 0:
+                conn.rollback()
+                logger.error(
+                    f"Appointment conflict detected: "
+                    f"Requested {appointment_date} {appointment_time} for {duration_minutes} min "
+                    f"overlaps with an existing appointment"
+                )
+                raise ValueError(
+                    f"Time slot is already booked. The requested time ({appointment_time.strftime('%H:%M')}) "
+                    f"conflicts with an existing appointment."
+                )
             conn.commit()
             appointment_id = cursor.lastrowid
             logger.info(
@@ -474,6 +606,7 @@ class Database:
 
             # Snapshot KPI event for analytics
             self._log_kpi_event(
+                cursor,
                 appointment_id=appointment_id,
                 event_type="booked",
                 service_id=service_id,
@@ -485,15 +618,32 @@ class Database:
                 appointment_date=appointment_date,
                 appointment_time=appointment_time
             )
+            conn.commit()
             return appointment_id
     
+    # Async variants for event-loop callers. Each runs the sync method on a worker
+    # thread with its own pooled connection, so the loop keeps serving other calls
+    # (TTS, calendar sync) while the MySQL round-trip is in flight.
+    async def aget_available_slots(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_available_slots, *args, **kwargs)
+    
+    async def acreate_appointment(self, *args, **kwargs) -> int:
+        return await asyncio.to_thread(self.create_appointment, *args, **kwargs)
+    
+    async def aget_customer_by_phone(self, phone: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_customer_by_phone, phone)
+    
+    async def aget_customer_appointments(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_customer_appointments, *args, **kwargs)
+    
+    async def acancel_appointment(self, appointment_id: int) -> bool:
+        return await asyncio.to_thread(self.cancel_appointment, appointment_id)
+    
     def get_customer_by_phone(self, phone: str) -> Optional[Dict[str, Any]]:
         """Get customer by phone number."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM customers WHERE phone = %s
-            """, (phone,))
+            cursor.execute(_CUSTOMER_BY_PHONE_SQL, (phone,))
             return cursor.fetchone()
     
     def create_or_update_customer(self, phone: str, name: Optional[str] = None,
@@ -505,49 +655,51 @@ class Database:
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            customer = self.get_customer_by_phone(phone)
-            
-            if customer:
-                cursor.execute("""
-                    UPDATE customers 
-                    SET name = COALESCE(%s, name), email = COALESCE(%s, email)
-                    WHERE id = %s
-                """, (name, email, customer['id']))
-                conn.commit()
-                return customer['id']
-            else:
-                cursor.execute("""
-                    INSERT INTO customers (phone, name, email)
-                    VALUES (%s, %s, %s)
-                """, (phone, name, email))
-                conn.commit()
-                return cursor.lastrowid
+            # One upsert on the phone UNIQUE key; LAST_INSERT_ID(id) makes lastrowid the
+            # existing row's id when it updates instead of inserting.
+            cursor.execute("""
+                INSERT INTO customers (phone, name, email)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    id = LAST_INSERT_ID(id),
+                    name = COALESCE(VALUES(name), name),
+                    email = COALESCE(VALUES(email), email)
+            """, (phone, name, email))
+            conn.commit()
+            return cursor.lastrowid
     
     def get_customer_appointments(self, customer_id: int,
                                   upcoming_only: bool = True,
                                   today: Optional[date] = None,
-                                  business_id: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Get appointments for a customer."""
+                                  business_id: Optional[int] = None,
+                                  stream: bool = False) -> Union[List[Dict[str, Any]], Iterator[Dict[str, Any]]]:
+        """Get appointments for a customer.
+        
+        With stream=True rows are yielded from an unbuffered cursor instead of
+        returned as a list, for callers that only iterate once.
+        """
+        query = """
+            SELECT a.*, s.name as service_name, st.name as staff_name
+            FROM appointments a
+            LEFT JOIN services s ON a.service_id = s.id
+            LEFT JOIN staff st ON a.staff_id = st.id
+            WHERE a.customer_id = %s
+        """
+        params: List[Any] = [customer_id]
+        if business_id is not None:
+            query += " AND a.business_id = %s"
+            params.append(business_id)
+        if upcoming_only:
+            if today:
+                query += " AND a.appointment_date >= %s AND a.status = 'scheduled'"
+                params.append(today)
+            else:
+                query += " AND a.appointment_date >= CURDATE() AND a.status = 'scheduled'"
+        query += " ORDER BY a.appointment_date, a.appointment_time"
+        if stream:
+            return self.iter_rows(query, tuple(params))
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            query = """
-                SELECT a.*, s.name as service_name, st.name as staff_name
-                FROM appointments a
-                LEFT JOIN services s ON a.service_id = s.id
-                LEFT JOIN staff st ON a.staff_id = st.id
-                WHERE a.customer_id = %s
-            """
-            params: List[Any] = [customer_id]
-            if business_id is not None:
-                query += " AND a.business_id = %s"
-                params.append(business_id)
-            if upcoming_only:
-                if today:
-                    query += " AND a.appointment_date >= %s AND a.status = 'scheduled'"
-                    params.append(today)
-                else:
-                    query += " AND a.appointment_date >= CURDATE() AND a.status = 'scheduled'"
-            query += " ORDER BY a.appointment_date, a.appointment_time"
             cursor.execute(query, tuple(params))
             return cursor.fetchall()
     
@@ -574,6 +726,7 @@ class Database:
 
             if success:
                 self._log_kpi_event(
+                    cursor,
                     appointment_id=appointment_id,
                     event_type="cancelled",
                     service_id=before.get("service_id") if before else None,
@@ -583,8 +736,27 @@ class Database:
                     appointment_date=before.get("appointment_date") if before else None,
                     appointment_time=before.get("appointment_time") if before else None
                 )
+                conn.commit()
             return success
 
+    def set_google_event_ids(self, event_ids: Dict[int, Optional[str]], only_unset: bool = False) -> None:
+        """Store Google Calendar event ids (None to unlink) for appointments in one batch.
+        
+        With only_unset=True, rows that already have an event id are left alone.
+        """
+        if not event_ids:
+            return
+        query = "UPDATE appointments SET google_event_id = %s WHERE id = %s"
+        if only_unset:
+            query += " AND google_event_id IS NULL"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                query,
+                [(event_id, appointment_id) for appointment_id, event_id in event_ids.items()]
+            )
+            conn.commit()
+
     def get_service_by_name(self, name: str, business_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Fetch a service by name (case-insensitive)."""
         with self.get_connection() as conn:
@@ -605,19 +777,22 @@ class Database:
     def get_service_by_id(self, service_id: int, business_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Fetch a service by id."""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            query = """
-                SELECT id, name, duration_minutes, price
-                FROM services
-                WHERE id = %s
-            """
-            params: List[Any] = [service_id]
-            if business_id is not None:
-                query += " AND business_id = %s"
-                params.append(business_id)
-            query += " LIMIT 1"
-            cursor.execute(query, tuple(params))
-            return cursor.fetchone()
+            return self._get_service_by_id(conn.cursor(), service_id, business_id)
+
+    @staticmethod
+    def _get_service_by_id(cursor, service_id: int, business_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        query = """
+            SELECT id, name, duration_minutes, price
+            FROM services
+            WHERE id = %s
+        """
+        params: List[Any] = [service_id]
+        if business_id is not None:
+            query += " AND business_id = %s"
+            params.append(business_id)
+        query += " LIMIT 1"
+        cursor.execute(query, tuple(params))
+        return cursor.fetchone()
 
     def get_staff_by_name(self, name: str, business_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Fetch a staff member by name (case-insensitive)."""
@@ -639,19 +814,22 @@ class Database:
     def get_staff_by_id(self, staff_id: int, business_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Fetch a staff member by id."""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            query = """
-                SELECT id, name, available
-                FROM staff
-                WHERE id = %s
-            """
-            params: List[Any] = [staff_id]
-            if business_id is not None:
-                query += " AND business_id = %s"
-                params.append(business_id)
-            query += " LIMIT 1"
-            cursor.execute(query, tuple(params))
-            return cursor.fetchone()
+            return self._get_staff_by_id(conn.cursor(), staff_id, business_id)
+
+    @staticmethod
+    def _get_staff_by_id(cursor, staff_id: int, business_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        query = """
+            SELECT id, name, available
+            FROM staff
+            WHERE id = %s
+        """
+        params: List[Any] = [staff_id]
+        if business_id is not None:
+            query += " AND business_id = %s"
+            params.append(business_id)
+        query += " LIMIT 1"
+        cursor.execute(query, tuple(params))
+        return cursor.fetchone()
 
     def get_available_staff(self, business_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Return available staff ordered by id."""
@@ -683,7 +861,7 @@ class Database:
             """, (appointment_id,))
             return cursor.fetchone()
 
-    def _log_kpi_event(self, appointment_id: int, event_type: str,
+    def _log_kpi_event(self, cursor, appointment_id: int, event_type: str,
                        service_id: Optional[int] = None,
                        staff_id: Optional[int] = None,
                        duration_minutes: Optional[int] = None,
@@ -692,33 +870,30 @@ class Database:
                        appointment_time: Optional[time] = None,
                        service_name: Optional[str] = None,
                        service_price: Optional[float] = None) -> None:
-        """Log KPI snapshot for analytics."""
+        """Log KPI snapshot for analytics on the caller's cursor; the caller commits."""
         try:
             staff_name = None
 
             if service_id and (service_name is None or service_price is None or duration_minutes is None):
-                svc = self.get_service_by_id(service_id)
+                svc = self._get_service_by_id(cursor, service_id)
                 if svc:
                     service_name = service_name or svc.get("name")
                     service_price = service_price if service_price is not None else svc.get("price")
                     duration_minutes = duration_minutes or svc.get("duration_minutes")
 
             if staff_id:
-                staff = self.get_staff_by_id(staff_id)
+                staff = self._get_staff_by_id(cursor, staff_id)
                 if staff:
                     staff_name = staff.get("name")
 
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO kpi_events
-                    (appointment_id, event_type, service_id, service_name, service_price,
-                     staff_id, staff_name, duration_minutes, status, appointment_date, appointment_time)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    appointment_id, event_type, service_id, service_name, service_price,
-                    staff_id, staff_name, duration_minutes, status, appointment_date, appointment_time
-                ))
-                conn.commit()
+            cursor.execute("""
+                INSERT INTO kpi_events
+                (appointment_id, event_type, service_id, service_name, service_price,
+                 staff_id, staff_name, duration_minutes, status, appointment_date, appointment_time)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
+                appointment_id, event_type, service_id, service_name, service_price,
+                staff_id, staff_name, duration_minutes, status, appointment_date, appointment_time
+            ))
         except Exception as e:
             logger.warning(f"Failed to log KPI event for appointment {appointment_id}: {e}")
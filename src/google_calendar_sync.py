@@ -1,32 +1,28 @@
 import json
 import os
-from datetime import date, datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
 from pathlib import Path
+from typing import Iterator
 
-import pandas as pd
+import numpy as np
+import httplib2
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
 
-SCOPES = ["https://www.googleapis.com/auth/calendar"]
-
-
-def get_engine() -> Engine:
-    host = os.getenv("DB_HOST") or os.getenv("MYSQL_HOST", "localhost")
-    port = os.getenv("DB_PORT") or os.getenv("MYSQL_PORT", "3306")
-    user = os.getenv("DB_USER") or os.getenv("MYSQL_USER", "root")
-    password = os.getenv("DB_PASSWORD") or os.getenv("MYSQL_PASSWORD", "")
-    db = os.getenv("DB_NAME") or os.getenv("MYSQL_DATABASE", "voice_assistant")
-    return create_engine(f"mysql+pymysql://{user}:{password}@{host}:{port}/{db}")
+from src.database import Database, _td_to_min
 
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
 
-def fetch_df(engine: Engine, query: str, params=None):
-    if isinstance(params, list):
-        params = tuple(params)
-    return pd.read_sql(text(query), con=engine, params=params)
+# Reused across sync_appointments runs: the built API client and its credentials.
+_service_cache = None
+_service_creds = None
+_service_lock = threading.Lock()
+_thread_http = threading.local()
 
 
 def _repo_root() -> Path:
@@ -37,7 +33,7 @@ def _token_path() -> Path:
     return _repo_root() / ".gcal_token.json"
 
 
-def _event_map_path() -> Path:
+def _legacy_event_map_path() -> Path:
     return _repo_root() / ".gcal_event_map.json"
 
 
@@ -46,6 +42,16 @@ def _client_secret_path() -> Path:
 
 
 def get_calendar_service():
+    global _service_cache, _service_creds
+    with _service_lock:
+        if _service_cache is not None and _service_creds is not None and _service_creds.valid:
+            return _service_cache
+        _service_creds = _load_credentials()
+        _service_cache = build("calendar", "v3", credentials=_service_creds)
+        return _service_cache
+
+
+def _load_credentials():
     token_path = _token_path()
     creds = None
     if token_path.exists():
@@ -62,110 +68,172 @@ def get_calendar_service():
             flow = InstalledAppFlow.from_client_secrets_file(str(client_secret), SCOPES)
             creds = flow.run_local_server(port=0)
         token_path.write_text(creds.to_json())
-    return build("calendar", "v3", credentials=creds)
+    return creds
+
 
+def migrate_legacy_event_map(db: Database) -> None:
+    """Move ids from the old JSON event map into appointments.google_event_id, once.
 
-def load_event_map() -> dict:
-    path = _event_map_path()
+    Rows that already have an event id keep it. The file is renamed afterwards so
+    later syncs skip this step.
+    """
+    path = _legacy_event_map_path()
     if not path.exists():
-        return {}
+        return
     try:
-        return json.loads(path.read_text())
+        legacy = json.loads(path.read_text())
     except json.JSONDecodeError:
-        return {}
-
+        legacy = {}
+    db.set_google_event_ids({int(appt_id): event_id for appt_id, event_id in legacy.items()}, only_unset=True)
+    path.rename(path.with_name(path.name + ".migrated"))
 
-def save_event_map(event_map: dict) -> None:
-    path = _event_map_path()
-    path.write_text(json.dumps(event_map, indent=2, sort_keys=True))
 
-
-def load_appointments(engine: Engine, start: date, end: date) -> pd.DataFrame:
-    return fetch_df(
-        engine,
+def load_appointments(db: Database, start: date, end: date) -> Iterator[dict]:
+    """Stream appointment rows in the range; events are built as rows arrive."""
+    return db.iter_rows(
         """
         SELECT a.id, a.appointment_date, a.appointment_time, a.duration_minutes, a.status,
-               s.name AS service_name, s.duration_minutes AS service_duration,
+               a.google_event_id, s.name AS service_name, s.duration_minutes AS service_duration,
                st.name AS staff_name
         FROM appointments a
         LEFT JOIN services s ON a.service_id = s.id
         LEFT JOIN staff st ON a.staff_id = st.id
         WHERE a.appointment_date BETWEEN %s AND %s
         """,
-        [start, end],
+        (start, end),
     )
 
 
-def _build_event(row, tzinfo):
-    if pd.isna(row["appointment_date"]):
-        return None
-    appt_date = pd.to_datetime(row["appointment_date"]).date()
-    appt_time = row.get("appointment_time")
-    if pd.isna(appt_time):
-        return None
-    appt_time = pd.to_datetime(appt_time, errors="coerce")
-    if pd.isna(appt_time):
-        return None
-    start = datetime.combine(appt_date, appt_time.time()).replace(tzinfo=tzinfo)
-    duration = pd.to_numeric(row.get("duration_minutes"), errors="coerce")
-    if pd.isna(duration):
-        duration = pd.to_numeric(row.get("service_duration"), errors="coerce")
-    if pd.isna(duration):
-        duration = 30
-    end = start + timedelta(minutes=float(duration))
-    service_name = row.get("service_name") or "Service"
-    staff_name = row.get("staff_name") or "Unassigned"
-    return {
-        "summary": f"{service_name} ({staff_name})",
-        "description": f"Appointment ID: {row.get('id')}",
-        "start": {"dateTime": start.isoformat()},
-        "end": {"dateTime": end.isoformat()},
-    }
+def _build_events(rows: list, tzinfo) -> list:
+    """(row, event body) pairs; start/end strings are formatted in one numpy pass."""
+    rows = [r for r in rows if r.get("appointment_date") is not None and r.get("appointment_time") is not None]
+    if not rows:
+        return []
+    count = len(rows)
+    dates = np.array([r["appointment_date"] for r in rows], dtype="datetime64[D]")
+    minutes = np.fromiter((_td_to_min(r["appointment_time"]) for r in rows), dtype=np.int64, count=count)
+    durations = np.fromiter(
+        (int(r.get("duration_minutes") or r.get("service_duration") or 30) for r in rows),
+        dtype=np.int64, count=count,
+    )
+    starts = dates.astype("datetime64[m]") + minutes.astype("timedelta64[m]")
+    ends = starts + durations.astype("timedelta64[m]")
+    # tzinfo is a fixed offset, so one suffix ("+02:00") applies to every timestamp.
+    offset = datetime(2000, 1, 1, tzinfo=tzinfo).isoformat()[19:]
+    start_strs = np.datetime_as_string(starts, unit="s").tolist()
+    end_strs = np.datetime_as_string(ends, unit="s").tolist()
+    return [
+        (row, {
+            "summary": f"{row.get('service_name') or 'Service'} ({row.get('staff_name') or 'Unassigned'})",
+            "description": f"Appointment ID: {row.get('id')}",
+            "start": {"dateTime": start_str + offset},
+            "end": {"dateTime": end_str + offset},
+        })
+        for row, start_str, end_str in zip(rows, start_strs, end_strs)
+    ]
+
+
+_BATCH_SIZE = 50  # Google's per-batch request limit for the Calendar API
+_BATCH_WORKERS = 4  # batches in flight at once
+
+
+def _worker_http():
+    """Per-thread authorized transport; httplib2.Http objects are not thread-safe."""
+    http = getattr(_thread_http, "http", None)
+    if http is None or http.credentials is not _service_creds:
+        http = _thread_http.http = AuthorizedHttp(_service_creds, http=httplib2.Http())
+    return http
+
+
+def _execute_batched(service, ops, callback) -> None:
+    """Send (request_id, request) pairs as batch HTTP requests of up to _BATCH_SIZE.
+
+    When there is more than one batch, up to _BATCH_WORKERS are sent concurrently.
+    """
+    chunks = [ops[i:i + _BATCH_SIZE] for i in range(0, len(ops), _BATCH_SIZE)]
+
+    def send(chunk, http=None):
+        batch = service.new_batch_http_request(callback=callback)
+        for request_id, request in chunk:
+            batch.add(request, request_id=request_id)
+        batch.execute(http=http)
+
+    if len(chunks) <= 1:
+        for chunk in chunks:
+            send(chunk)
+        return
+    with ThreadPoolExecutor(max_workers=min(_BATCH_WORKERS, len(chunks))) as pool:
+        for future in [pool.submit(lambda c=chunk: send(c, _worker_http())) for chunk in chunks]:
+            future.result()
 
 
 def sync_appointments(calendar_id: str = "primary", start: date | None = None, end: date | None = None):
-    engine = get_engine()
     start = start or (date.today() - timedelta(days=7))
     end = end or (date.today() + timedelta(days=60))
-    appts = load_appointments(engine, start, end)
+    db = Database()
+    migrate_legacy_event_map(db)
+    appts = load_appointments(db, start, end)
 
     service = get_calendar_service()
-    event_map = load_event_map()
     tzinfo = datetime.now().astimezone().tzinfo
 
-    for _, row in appts.iterrows():
+    # Requests are keyed "<op>:<appointment id>" and sent in batches of up to 50.
+    ops = []
+    bodies = {}
+    scheduled = []
+    event_ids = {}  # appointment id -> event id for every row seen
+    changed = {}  # appointment id -> event id (None to unlink) to write back
+    for row in appts:
         appt_id = str(row.get("id"))
         status = (row.get("status") or "").lower()
-        event_id = event_map.get(appt_id)
+        event_id = event_ids[appt_id] = row.get("google_event_id")
 
         if status in {"cancelled", "no_show"}:
             if event_id:
-                try:
-                    service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
-                except Exception:
-                    pass
-                event_map.pop(appt_id, None)
+                ops.append((f"delete:{appt_id}", service.events().delete(calendarId=calendar_id, eventId=event_id)))
+                event_ids[appt_id] = changed[appt_id] = None
             continue
 
-        if status != "scheduled":
-            continue
-
-        event_body = _build_event(row, tzinfo)
-        if not event_body:
-            continue
+        if status == "scheduled":
+            scheduled.append(row)
 
+    for row, event_body in _build_events(scheduled, tzinfo):
+        appt_id = str(row.get("id"))
+        event_id = event_ids[appt_id]
+        bodies[appt_id] = event_body
         if event_id:
-            try:
-                service.events().update(calendarId=calendar_id, eventId=event_id, body=event_body).execute()
-                continue
-            except Exception:
-                event_map.pop(appt_id, None)
-
-        created = service.events().insert(calendarId=calendar_id, body=event_body).execute()
-        event_map[appt_id] = created.get("id")
-
-    save_event_map(event_map)
+            ops.append((
+                f"update:{appt_id}",
+                service.events().update(calendarId=calendar_id, eventId=event_id, body=event_body),
+            ))
+        else:
+            ops.append((f"insert:{appt_id}", service.events().insert(calendarId=calendar_id, body=event_body)))
+
+    retry_inserts = []
+    insert_errors = []
+
+    def on_response(request_id, response, exception):
+        op, appt_id = request_id.split(":", 1)
+        if op == "update" and exception is not None:
+            # Event was deleted on the calendar side; recreate it.
+            event_ids[appt_id] = changed[appt_id] = None
+            retry_inserts.append((
+                f"insert:{appt_id}",
+                service.events().insert(calendarId=calendar_id, body=bodies[appt_id]),
+            ))
+        elif op == "insert":
+            if exception is not None:
+                insert_errors.append(exception)
+            else:
+                event_ids[appt_id] = changed[appt_id] = response.get("id")
+
+    _execute_batched(service, ops, on_response)
+    _execute_batched(service, retry_inserts, on_response)
+
+    db.set_google_event_ids({int(appt_id): event_id for appt_id, event_id in changed.items()})
+    if insert_errors:
+        raise insert_errors[0]
     return {
-        "synced": len(event_map),
+        "synced": sum(1 for event_id in event_ids.values() if event_id),
         "range": f"{start} to {end}",
     }
@@ -1,4 +1,5 @@
 """Helper script to initialize database with business data from config."""
+import json
 import os
 import sys
 try:
@@ -11,6 +12,34 @@ from datetime import datetime
 
 load_dotenv()
 
+# Rows whose lowercased name is missing from the configured names, passed as one JSON array
+# so the statement text is the same however many names there are (an empty array matches all).
+_DEACTIVATE_SERVICES_SQL = """
+    UPDATE services SET active = FALSE
+    WHERE business_id = %s AND NOT JSON_CONTAINS(%s, JSON_QUOTE(LOWER(name)))
+"""
+_DEACTIVATE_STAFF_SQL = """
+    UPDATE staff SET available = FALSE
+    WHERE business_id = %s AND NOT JSON_CONTAINS(%s, JSON_QUOTE(LOWER(name)))
+"""
+
+
+def _existing_ids(cursor, table: str, business_id: int) -> dict:
+    """Lowercased name -> id for every row of `table` (services/staff) owned by the business."""
+    cursor.execute(f"SELECT id, LOWER(name) AS lname FROM {table} WHERE business_id = %s", (business_id,))
+    return {row['lname']: row['id'] for row in cursor.fetchall()}
+
+
+def _multi_row(cursor, insert_sql: str, rows) -> str:
+    """Render an INSERT ... VALUES {values} statement with one escaped tuple per row."""
+    rows = list(rows)
+    if "{values}" not in insert_sql:
+        raise ValueError("insert_sql needs a {values} placeholder for the row tuples")
+    if not rows or len({len(row) for row in rows}) != 1:
+        raise ValueError("_multi_row needs at least one row, all of the same length")
+    values = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+    return insert_sql.format(values=",\n".join(cursor.mogrify(values, row) for row in rows))
+
 
 def init_business_data():
     """Initialize database with business data from config."""
@@ -18,29 +47,34 @@ def init_business_data():
     config_path = os.getenv('CONFIG_FILE', 'config/business_config.yaml')
     
     # Check if config file exists, if not, try to create from example
-    if not os.path.exists(config_path):
+    try:
+        os.stat(config_path)
+    except FileNotFoundError:
         example_path = config_path + '.example'
-        if os.path.exists(example_path):
-            print(f"Config file not found. Creating from example: {example_path}")
-            import shutil
-            shutil.copy(example_path, config_path)
-            print(f"Created {config_path} from example. Please customize it for your business.")
-        else:
+        import shutil
+        try:
+            # copyfile copies in-kernel (sendfile) on Linux; a missing example raises here
+            shutil.copyfile(example_path, config_path)
+        except FileNotFoundError:
             raise FileNotFoundError(
                 f"Config file not found: {config_path}\n"
                 f"Please create it or copy from an example file."
-            )
+            ) from None
+        print(f"Config file not found. Created {config_path} from example: {example_path}")
+        print("Please customize it for your business.")
     
-    config = ConfigLoader(config_path)
+    config = ConfigLoader.get_or_load(config_path)
     db = Database()
     
     # Initialize schema
     print("Creating database schema...")
     db.initialize_schema()
     
-    # Insert or sync business data
-    with db.get_connection() as conn:
+    # Insert or sync business data. Reads run as they go; every write after the business
+    # row is queued and sent as a single multi-statement batch.
+    with db.multi_statement_connection() as conn:
         cursor = conn.cursor()
+        writes = []
 
         # Upsert business
         business_name = config.get_business_name()
@@ -76,117 +110,75 @@ def init_business_data():
             """, (business_name, business_type, business_phone, business_timezone, business_address, business_website))
             business_id = cursor.lastrowid
         
-        # Upsert services
+        # Upsert services: one lookup of existing rows, then one multi-row upsert keyed on id
+        # (NULL id inserts, a known id hits the primary key and updates in place)
         services = config.get_services()
-        service_names = set()
-        for service in services:
-            name = service['name']
-            service_names.add(name.lower())
-            cursor.execute("""
-                SELECT id FROM services WHERE business_id = %s AND LOWER(name) = LOWER(%s)
-            """, (business_id, name))
-            existing = cursor.fetchone()
-            if existing:
-                cursor.execute("""
-                    UPDATE services
-                    SET duration_minutes = %s, price = %s, active = TRUE
-                    WHERE id = %s
-                """, (
-                    service.get('duration_minutes', 30),
-                    service.get('price', 0),
-                    existing['id']
-                ))
-            else:
-                cursor.execute("""
-                    INSERT INTO services (business_id, name, duration_minutes, price, active)
-                    VALUES (%s, %s, %s, %s, TRUE)
-                """, (
-                    business_id,
-                    name,
-                    service.get('duration_minutes', 30),
-                    service.get('price', 0)
-                ))
-        if service_names:
-            placeholders = ", ".join(["%s"] * len(service_names))
-            cursor.execute(
-                f"UPDATE services SET active = FALSE WHERE business_id = %s AND LOWER(name) NOT IN ({placeholders})",
-                (business_id, *tuple(service_names))
-            )
-        else:
-            cursor.execute("UPDATE services SET active = FALSE WHERE business_id = %s", (business_id,))
+        service_rows = {s['name'].lower(): s for s in services}  # last entry wins, as before
+        service_names = set(service_rows)
+        existing_services = _existing_ids(cursor, "services", business_id)
+        if service_rows:
+            writes.append(_multi_row(cursor, """
+                INSERT INTO services (id, business_id, name, duration_minutes, price, active)
+                VALUES {values}
+                ON DUPLICATE KEY UPDATE
+                    duration_minutes = VALUES(duration_minutes),
+                    price = VALUES(price),
+                    active = TRUE
+            """, [
+                (existing_services.get(lname), business_id, service['name'],
+                 service.get('duration_minutes', 30), service.get('price', 0), True)
+                for lname, service in service_rows.items()
+            ]))
+        writes.append(cursor.mogrify(_DEACTIVATE_SERVICES_SQL, (business_id, json.dumps(sorted(service_names)))))
         
-        # Upsert staff
+        # Upsert staff: same pattern as services
         staff = config.get_staff()
-        staff_names = set()
-        for staff_member in staff:
-            name = staff_member['name']
-            staff_names.add(name.lower())
-            cursor.execute("""
-                SELECT id FROM staff WHERE business_id = %s AND LOWER(name) = LOWER(%s)
-            """, (business_id, name))
-            existing = cursor.fetchone()
-            if existing:
-                cursor.execute("""
-                    UPDATE staff
-                    SET available = %s, email = %s
-                    WHERE id = %s
-                """, (
-                    staff_member.get('available', True),
-                    staff_member.get('email'),
-                    existing['id']
-                ))
-            else:
-                cursor.execute("""
-                    INSERT INTO staff (business_id, name, available, email)
-                    VALUES (%s, %s, %s, %s)
-                """, (
-                    business_id,
-                    name,
-                    staff_member.get('available', True),
-                    staff_member.get('email')
-                ))
-        if staff_names:
-            placeholders = ", ".join(["%s"] * len(staff_names))
-            cursor.execute(
-                f"UPDATE staff SET available = FALSE WHERE business_id = %s AND LOWER(name) NOT IN ({placeholders})",
-                (business_id, *tuple(staff_names))
-            )
-        else:
-            cursor.execute("UPDATE staff SET available = FALSE WHERE business_id = %s", (business_id,))
+        staff_rows = {s['name'].lower(): s for s in staff}
+        staff_names = set(staff_rows)
+        existing_staff = _existing_ids(cursor, "staff", business_id)
+        if staff_rows:
+            writes.append(_multi_row(cursor, """
+                INSERT INTO staff (id, business_id, name, available, email)
+                VALUES {values}
+                ON DUPLICATE KEY UPDATE
+                    available = VALUES(available),
+                    email = VALUES(email)
+            """, [
+                (existing_staff.get(lname), business_id, staff_member['name'],
+                 staff_member.get('available', True), staff_member.get('email'))
+                for lname, staff_member in staff_rows.items()
+            ]))
+        writes.append(cursor.mogrify(_DEACTIVATE_STAFF_SQL, (business_id, json.dumps(sorted(staff_names)))))
         
-        # Upsert business hours
+        # Upsert business hours; (business_id, day_of_week) is unique, so one multi-row statement
         hours = config.get_hours()
         day_map = {
             'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
             'friday': 4, 'saturday': 5, 'sunday': 6
         }
-        
+        hours_rows = []
         for day_name, day_num in day_map.items():
             day_hours = hours.get(day_name, {})
             open_time = day_hours.get('open')
             close_time = day_hours.get('close')
             is_closed = open_time is None or close_time is None
-            cursor.execute("""
-                SELECT id FROM business_hours WHERE business_id = %s AND day_of_week = %s
-            """, (business_id, day_num))
-            existing = cursor.fetchone()
-            if existing:
-                cursor.execute("""
-                    UPDATE business_hours
-                    SET open_time = %s, close_time = %s, is_closed = %s
-                    WHERE id = %s
-                """, (open_time, close_time, is_closed, existing['id']))
-            else:
-                cursor.execute("""
-                    INSERT INTO business_hours 
-                    (business_id, day_of_week, open_time, close_time, is_closed)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (business_id, day_num, open_time, close_time, is_closed))
+            hours_rows.append((business_id, day_num, open_time, close_time, is_closed))
+        writes.append(_multi_row(cursor, """
+            INSERT INTO business_hours 
+            (business_id, day_of_week, open_time, close_time, is_closed)
+            VALUES {values}
+            ON DUPLICATE KEY UPDATE
+                open_time = VALUES(open_time),
+                close_time = VALUES(close_time),
+                is_closed = VALUES(is_closed)
+        """, hours_rows))
 
+        cursor.execute(";\n".join(writes))
+        while cursor.nextset():
+            pass
         conn.commit()
         # Persist the resolved business id back into the active config so runtime uses the same tenant.
-        config.config.setdefault("business", {})
-        config.config["business"]["id"] = int(business_id)
+        config.set("business.id", int(business_id))
         with open(config_path, "w", encoding="utf-8") as f:
             import yaml
             yaml.safe_dump(config.config, f, sort_keys=False, allow_unicode=True)
@@ -0,0 +1,123 @@
+"""Shared OpenAI clients (async per loop, plus one sync client per key) and the loop that drives the async ones."""
+import asyncio
+import atexit
+import threading
+import weakref
+from typing import Any, Coroutine, Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+# Keep-alive pool shared by every agent/translator call on a loop.
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60)
+
+# Sync callers (STT uploads) make one request at a time but benefit from a warm connection
+# between turns, so the pool is small with a long keep-alive.
+_SYNC_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120)
+
+try:
+    import h2  # noqa: F401  # httpx's optional HTTP/2 support
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# httpx pools are bound to the loop they were created on, so clients are cached per loop.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Optional[str], AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+_sync_clients: Dict[Optional[str], OpenAI] = {}
+_sync_lock = threading.Lock()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+def get_async_client(api_key: Optional[str] = None) -> AsyncOpenAI:
+    """Return the pooled AsyncOpenAI client for the running event loop.
+
+    Args:
+        api_key: OpenAI API key; None falls back to the OPENAI_API_KEY env var
+    """
+    loop = asyncio.get_running_loop()
+    per_loop = _clients.setdefault(loop, {})
+    client = per_loop.get(api_key)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(limits=_HTTP_LIMITS),
+        )
+        per_loop[api_key] = client
+    return client
+
+
+def get_client(api_key: Optional[str] = None) -> OpenAI:
+    """Return the process-wide sync OpenAI client for api_key (HTTP/2 when h2 is installed).
+
+    Args:
+        api_key: OpenAI API key; None falls back to the OPENAI_API_KEY env var
+    """
+    client = _sync_clients.get(api_key)
+    if client is None:
+        with _sync_lock:
+            client = _sync_clients.get(api_key)
+            if client is None:
+                client = OpenAI(
+                    api_key=api_key,
+                    http_client=DefaultHttpxClient(http2=_HTTP2, timeout=30.0, limits=_SYNC_HTTP_LIMITS),
+                )
+                _sync_clients[api_key] = client
+    return client
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="openai-client-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine on the shared background loop and block for its result.
+
+    Lets synchronous callers (voice loop, Dash callbacks, CLI) use the async
+    agents while every request still goes through one pooled client.
+    """
+    loop = _shared_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_sync() called from the shared loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def _close_clients():
+    loop = asyncio.get_running_loop()
+    for client in _clients.pop(loop, {}).values():
+        await client.close()
+
+
+def close():
+    """Close the pooled sync clients and the clients on the shared loop, then stop it."""
+    global _loop
+    with _sync_lock:
+        sync_clients = list(_sync_clients.values())
+        _sync_clients.clear()
+    for client in sync_clients:
+        client.close()
+    with _loop_lock:
+        loop = _loop
+        _loop = None
+    if loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_close_clients(), loop).result(timeout=5)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(close)
@@ -0,0 +1,99 @@
+"""In-memory LLM response cache keyed on normalized text, with optional embedding similarity."""
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.openai_client import get_async_client
+
+_PUNCT_RE = re.compile(r"[^\w\s:@.-]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation noise and collapse whitespace."""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", (text or "").lower())).strip()
+
+
+class SemanticCache:
+    """LRU cache of LLM results.
+
+    Lookups always try an exact match on (scope, normalized text). When a
+    similarity threshold is configured, misses fall back to cosine similarity
+    over embeddings of earlier entries in the same scope. That costs one
+    embeddings request per lookup, and it can conflate near-identical
+    phrasings ("this week" vs "last week"), so it is opt-in.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        threshold: Optional[float] = None,
+        embedding_model: str = "text-embedding-3-small",
+        api_key: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.embedding_model = embedding_model
+        self.api_key = api_key
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._vectors: Dict[Tuple[str, str], np.ndarray] = {}
+        self._pending_vectors: Dict[str, np.ndarray] = {}
+
+    async def _embed(self, normalized: str) -> Optional[np.ndarray]:
+        vector = self._pending_vectors.get(normalized)
+        if vector is not None:
+            return vector
+        try:
+            resp = await get_async_client(self.api_key).embeddings.create(
+                model=self.embedding_model,
+                input=normalized,
+            )
+        except Exception:
+            return None
+        vector = np.asarray(resp.data[0].embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        # Keep only the latest lookup's vector so a following put() can reuse it.
+        self._pending_vectors = {normalized: vector}
+        return vector
+
+    async def get(self, scope: str, text: str) -> Optional[Any]:
+        normalized = normalize_text(text)
+        key = (scope, normalized)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self.threshold is None or not normalized:
+            return None
+        candidates = [k for k in self._vectors if k[0] == scope]
+        if not candidates:
+            return None
+        query = await self._embed(normalized)
+        if query is None:
+            return None
+        matrix = np.stack([self._vectors[k] for k in candidates])
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        hit = candidates[best]
+        self._entries.move_to_end(hit)
+        return self._entries[hit]
+
+    async def put(self, scope: str, text: str, value: Any):
+        normalized = normalize_text(text)
+        if not normalized:
+            return
+        key = (scope, normalized)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if self.threshold is not None:
+            vector = await self._embed(normalized)
+            if vector is not None:
+                self._vectors[key] = vector
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._vectors.pop(old_key, None)
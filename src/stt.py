@@ -1,18 +1,47 @@
 """Speech-to-Text module for real-time voice transcription."""
 import sounddevice as sd
 import numpy as np
-import os
-from openai import OpenAI
+import io
+import math
+import wave
+from src.openai_client import get_client
 from typing import Optional, Callable
 import threading
 import queue
-import time
 from src.config import (
     SAMPLE_RATE, CHANNELS, RECORD_MAX_SECONDS, FRAME_DURATION_SEC,
     SILENCE_DURATION_SEC, ENERGY_FLOOR, ENERGY_CEIL, STOP_THRESHOLD_RATIO,
     STT_MODEL, STT_LANGUAGE
 )
 
+try:
+    from numba import njit
+except ImportError:  # optional; frame energy falls back to numpy
+    njit = None
+
+try:
+    import pyogg
+except ImportError:  # optional; uploads fall back to WAV
+    pyogg = None
+
+# Sample rates libopus accepts natively
+_OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _rms_i16(a):
+        """RMS of a 1-D int16 frame, in raw sample units."""
+        s = 0.0
+        for x in a:
+            s += float(x) * x
+        return (s / a.size) ** 0.5
+else:
+    def _rms_i16(a):
+        """RMS of a 1-D int16 frame, in raw sample units."""
+        # Sum of squares accumulated in float64 (an int16 dot product would overflow)
+        return math.sqrt(float(np.einsum('i,i->', a, a, dtype=np.float64)) / a.size)
+
 
 class SpeechToText:
     """Real-time microphone listener with OpenAI Whisper transcription."""
@@ -23,7 +52,7 @@ class SpeechToText:
         Args:
             api_key: OpenAI API key
         """
-        self.client = OpenAI(api_key=api_key)
+        self.client = get_client(api_key)
         self.model = STT_MODEL
         
         # Audio settings from config
@@ -44,14 +73,54 @@ class SpeechToText:
         self.stop_threshold = None
         
         self.is_listening = False
+        self._done = threading.Event()  # set when the current listen() should stop waiting
         self.audio_queue = queue.Queue()
         self.calibrated = False
         self.recording = None  # Will hold the recording array
+        
+        # Capture buffer reused by every listen(); the callback copies frames in at an offset.
+        # One block of headroom past the cap, since the max-duration check runs after the copy.
+        # Audio is captured as int16 PCM, which is what the WAV upload carries.
+        self._buf = np.empty(
+            (int(self.record_max_seconds * self.sample_rate) + self.chunk_size, self.channels),
+            dtype=np.int16
+        )
+        # Calibration recording buffer, sized for up to 5 s (calibrate() grows it if asked for more)
+        self._calib_buf = np.empty((int(5.0 * self.sample_rate), self.channels), dtype=np.int16)
     
     def _calculate_energy(self, audio_data: np.ndarray) -> float:
-        """Calculate energy level of audio frame."""
-        # sounddevice returns float32 in range [-1.0, 1.0]
-        return np.abs(audio_data).mean()
+        """Calculate energy level (RMS) of a 1-D int16 audio frame, scaled to [0, 1]."""
+        return _rms_i16(audio_data) / 32768.0
+    
+    def _encode_upload(self, recording: np.ndarray) -> tuple:
+        """(filename, bytes, mimetype) for the transcription upload.
+        
+        Ogg/Opus is roughly a tenth the size of 16-bit WAV, so it is used when pyogg is
+        installed and the sample rate suits Opus; anything else (or an encoder error) sends WAV.
+        """
+        if pyogg is not None and self.sample_rate in _OPUS_RATES:
+            try:
+                encoder = pyogg.OpusBufferedEncoder()
+                encoder.set_application("voip")
+                encoder.set_sampling_frequency(self.sample_rate)
+                encoder.set_channels(self.channels)
+                encoder.set_frame_size(20)  # milliseconds
+                ogg = io.BytesIO()
+                writer = pyogg.OggOpusWriter(ogg, encoder)
+                writer.write(memoryview(bytearray(recording.tobytes())))
+                writer.close()
+                return ("speech.ogg", ogg.getvalue(), "audio/ogg")
+            except Exception as e:
+                print(f"Opus encoding failed, sending WAV: {e}")
+        
+        # Write the WAV in memory and upload it from there; no temp file round-trip
+        wav = io.BytesIO()
+        with wave.open(wav, 'wb') as wf:
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(2)  # 16-bit
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(recording.tobytes())
+        return ("speech.wav", wav.getvalue(), "audio/wav")
     
     def calibrate(self, duration: float = 1.0):
         """Calibrate noise level from ambient sound using short, robust stats (median/percentile).
@@ -60,22 +129,22 @@ class SpeechToText:
         """
         print("Calibrating noise level... (please be quiet)")
         
-        recording = sd.rec(
-            int(duration * self.sample_rate),
-            samplerate=self.sample_rate,
-            channels=self.channels,
-            dtype='float32'
-        )
+        n = int(duration * self.sample_rate)
+        if n > len(self._calib_buf):
+            self._calib_buf = np.empty((n, self.channels), dtype=np.int16)
+        recording = self._calib_buf[:n]
+        sd.rec(out=recording, samplerate=self.sample_rate)
         sd.wait()
         
-        energies = []
+        # Per-frame RMS for every full frame in one reduction (same scale as _calculate_energy)
         frame_size = self.chunk_size
-        for i in range(0, len(recording), frame_size):
-            chunk = recording[i:i+frame_size]
-            if len(chunk) > 0:
-                energies.append(self._calculate_energy(chunk.flatten()))
+        n_frames = len(recording) // frame_size
+        frames = recording[:n_frames * frame_size].reshape(n_frames, frame_size * self.channels)
+        energies = np.sqrt(
+            np.einsum('ij,ij->i', frames, frames, dtype=np.float64) / frames.shape[1]
+        ) / 32768.0
         
-        if not energies:
+        if not energies.size:
             ambient_energy = self.energy_floor
         else:
             ambient_energy = np.median(energies)
@@ -105,14 +174,18 @@ class SpeechToText:
             self.calibrate()
         
         print("Listening... (speak now)")
+        self._done.clear()
         self.is_listening = True
         
-        # Record audio with streaming callback
-        recording_frames = []
+        # Record audio with streaming callback. The callback times silence and the recording
+        # cap by samples captured (the audio clock) rather than reading the wall clock.
+        buf = self._buf
+        silence_samples = int(self.silence_duration_sec * self.sample_rate)
+        max_samples = int(self.record_max_seconds * self.sample_rate)
         callback_state = {
+            'written': 0,
             'silence_start': None,
             'speech_detected': False,
-            'recording_start': time.time(),
             'should_stop': False,
             # Seed adaptive noise floor from calibration; updated in callback
             'noise_floor': (self.start_threshold or self.energy_floor) / 2.5
@@ -124,10 +197,11 @@ class SpeechToText:
                 print(f"Audio status: {status}")
             
             if not self.is_listening or callback_state['should_stop']:
+                self._done.set()
                 raise sd.CallbackStop
             
-            # Calculate energy
-            energy = self._calculate_energy(indata.flatten())
+            # Calculate energy (reshape is a view of the contiguous block; flatten would copy)
+            energy = self._calculate_energy(indata.reshape(-1))
             
             # Adaptive noise floor (EMA) to follow changing ambient noise; common lightweight VAD technique
             if not callback_state['speech_detected']:
@@ -137,7 +211,10 @@ class SpeechToText:
                 self.start_threshold = dynamic_start
                 self.stop_threshold = self.start_threshold * self.stop_threshold_ratio
             
-            recording_frames.append(indata.copy())
+            written = callback_state['written']
+            n = min(len(indata), len(buf) - written)
+            buf[written:written + n] = indata[:n]
+            callback_state['written'] = written + n
             
             # Detect speech using adaptive start threshold
             if energy > self.start_threshold:
@@ -147,36 +224,34 @@ class SpeechToText:
                 # Once speech detected, use stop threshold
                 if energy <= self.stop_threshold:
                     if callback_state['silence_start'] is None:
-                        callback_state['silence_start'] = time.time()
+                        callback_state['silence_start'] = callback_state['written']
                     
                     # Stop if silence duration exceeded
-                    if time.time() - callback_state['silence_start'] >= self.silence_duration_sec:
+                    if callback_state['written'] - callback_state['silence_start'] >= silence_samples:
                         callback_state['should_stop'] = True
+                        self._done.set()
                         raise sd.CallbackStop
                 else:
                     # Still above stop threshold, reset silence timer
                     callback_state['silence_start'] = None
             
             # Check max recording time
-            if time.time() - callback_state['recording_start'] >= self.record_max_seconds:
-                if len(recording_frames) > 0:
-                    callback_state['should_stop'] = True
-                    raise sd.CallbackStop
+            if callback_state['written'] >= max_samples:
+                callback_state['should_stop'] = True
+                self._done.set()
+                raise sd.CallbackStop
         
         try:
             # Start streaming
             with sd.InputStream(
                 samplerate=self.sample_rate,
                 channels=self.channels,
-                dtype='float32',
+                dtype='int16',
                 blocksize=self.chunk_size,
                 callback=audio_callback
             ):
-                # Wait for callback to stop or timeout
-                while self.is_listening and not callback_state['should_stop']:
-                    time.sleep(0.1)
-                    if time.time() - callback_state['recording_start'] >= self.record_max_seconds + 1:
-                        break
+                # Wait for the callback (or stop()) to signal, or time out
+                self._done.wait(timeout=self.record_max_seconds + 1)
         
         except KeyboardInterrupt:
             self.is_listening = False
@@ -187,47 +262,28 @@ class SpeechToText:
         self.is_listening = False
         print("Processing speech...")
         
-        if not recording_frames:
+        if not callback_state['written']:
             return ""
         
-        # Concatenate all frames
-        recording = np.concatenate(recording_frames, axis=0)
+        recording = buf[:callback_state['written']]
         
         # Transcribe using OpenAI Whisper
         try:
-            # Save to temporary file for API
-            import tempfile
-            import wave
-            import struct
+            # Transcribe
+            request = {
+                "model": self.model,
+                "file": self._encode_upload(recording),
+            }
+            if STT_LANGUAGE:
+                request["language"] = STT_LANGUAGE
+            transcript = self.client.audio.transcriptions.create(**request)
+            
+            text = transcript.text.strip()
+            
+            if on_transcription:
+                on_transcription(text)
             
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                # Convert float32 to int16 for WAV file
-                audio_int16 = (recording * 32767).astype(np.int16)
-                
-                # Write as WAV file
-                with wave.open(tmp_file.name, 'wb') as wf:
-                    wf.setnchannels(self.channels)
-                    wf.setsampwidth(2)  # 16-bit
-                    wf.setframerate(self.sample_rate)
-                    wf.writeframes(audio_int16.tobytes())
-                
-                # Transcribe
-                with open(tmp_file.name, 'rb') as audio_file:
-                    request = {
-                        "model": self.model,
-                        "file": audio_file,
-                    }
-                    if STT_LANGUAGE:
-                        request["language"] = STT_LANGUAGE
-                    transcript = self.client.audio.transcriptions.create(**request)
-                
-                text = transcript.text.strip()
-                os.unlink(tmp_file.name)
-                
-                if on_transcription:
-                    on_transcription(text)
-                
-                return text
+            return text
         
         except Exception as e:
             print(f"Transcription error: {e}")
@@ -236,6 +292,7 @@ class SpeechToText:
     def stop(self):
         """Stop listening."""
         self.is_listening = False
+        self._done.set()
     
     def cleanup(self):
         """Clean up resources."""
@@ -1,14 +1,187 @@
 """Backend tools/actions for the agent to call."""
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, date, time, timedelta
 from dateutil import parser as date_parser
 from dateutil.tz import gettz
 import re
+from functools import lru_cache
 from src.config import APP_TIMEZONE
+from src.database import _td_to_min
+
+try:
+    import ciso8601
+except ImportError:  # optional; ISO dates go through strptime instead
+    ciso8601 = None
 
 logger = logging.getLogger(__name__)
 
+_APP_TZ = gettz(APP_TIMEZONE)
+
+# Well-formed inputs tried with strptime before falling back to dateutil. Every date format
+# carries a year, so none of the year/weekday adjustments below apply to a match.
+_FAST_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m-%d-%Y", "%B %d %Y", "%B %d, %Y", "%b %d %Y", "%b %d, %Y")
+_FAST_TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M%p", "%I:%M %p", "%I%p", "%I %p")
+
+_YEAR_RE = re.compile(r'\b(?:19|20)\d{2}\b')
+_TIME_RE = re.compile(r'(\d{1,2}):?(\d{2})?')
+_MERIDIEM_RE = re.compile(r"\b(am|pm)\b")
+_WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6
+}
+_DOW_RE = re.compile("|".join(_WEEKDAYS))
+_DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+_PHONE_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+_NON_DIGIT_RE = re.compile(r"\D")
+
+
+@lru_cache(maxsize=512)
+def _parse_date_cached(date_str: str, today: date) -> Tuple[Optional[date], tuple]:
+    """Parse date_str (lowercased, stripped) and return (result, log events).
+
+    Cached on (text, today): the result depends on nothing else, and agents see the same
+    phrases ("tomorrow", "friday") over and over. The (message, extra) log events are
+    returned rather than logged so BackendTools._parse_date logs them on every call.
+    """
+    events: List[Tuple[str, Dict[str, Any]]] = []
+    return _resolve_date(date_str, today, events), tuple(events)
+
+
+def _resolve_date(date_str: str, today: date, events: list) -> Optional[date]:
+    """Body of BackendTools._parse_date; log events are appended to `events`."""
+    date_str_lower = date_str
+    dow_match = _DOW_RE.search(date_str_lower)
+    desired_weekday = _WEEKDAYS[dow_match.group(0)] if dow_match else None
+
+    # Handle relative dates first (before dateutil parser)
+    if "today" in date_str_lower:
+        events.append(("parse_date resolved relative", {"input": date_str, "result": today.isoformat()}))
+        return today
+    elif "tomorrow" in date_str_lower:
+        events.append(("parse_date resolved relative", {"input": date_str, "result": (today.toordinal() + 1)}))
+        return date.fromordinal(today.toordinal() + 1)
+    elif "yesterday" in date_str_lower:
+        events.append(("parse_date resolved relative", {"input": date_str, "result": (today.toordinal() - 1)}))
+        return date.fromordinal(today.toordinal() - 1)
+
+    # Handle day of week: "Monday"/"this Monday" -> upcoming occurrence (today counts),
+    # "next Monday" -> upcoming occurrence, a week out when today is Monday
+    if desired_weekday is not None:
+        days_ahead = (desired_weekday - today.weekday()) % 7
+        if days_ahead == 0 and "next " in date_str_lower:
+            days_ahead = 7
+        return date.fromordinal(today.toordinal() + days_ahead)
+
+    if ciso8601 is not None and len(date_str) >= 8 and date_str[4] == "-":
+        try:
+            return ciso8601.parse_datetime(date_str).date()
+        except ValueError:
+            pass
+    for fmt in _FAST_DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            pass
+
+    # Try dateutil parser for specific dates (e.g., "December 29th, 2025", "12/29/2025")
+    try:
+        # Check if year is explicitly mentioned in the date string
+        year_match = _YEAR_RE.search(date_str)
+        has_explicit_year = year_match is not None
+
+        # Use today as default to ensure current year is used when not specified
+        parsed = date_parser.parse(date_str, default=datetime.combine(today, time()))
+        parsed_date = parsed.date()
+
+        # If parsed date is in the past and no explicit year was given, adjust to current/future year
+        if parsed_date < today and not has_explicit_year:
+            # Try current year first
+            parsed_date_current_year = parsed_date.replace(year=today.year)
+            if parsed_date_current_year >= today:
+                return parsed_date_current_year
+            # If current year is still in past, try next year
+            parsed_date_next_year = parsed_date.replace(year=today.year + 1)
+            parsed_date = parsed_date_next_year
+
+        # Align to requested weekday if provided and no explicit year (common STT mismatch)
+        if desired_weekday is not None and not has_explicit_year:
+            if parsed_date.weekday() != desired_weekday:
+                days_ahead = (desired_weekday - parsed_date.weekday()) % 7
+                parsed_date = date.fromordinal(parsed_date.toordinal() + days_ahead)
+                events.append((
+                    "parse_date adjusted to match weekday",
+                    {"input": date_str, "adjusted": parsed_date.isoformat(), "desired_weekday": desired_weekday}
+                ))
+
+        events.append((
+            "parse_date parsed",
+            {
+                "input": date_str,
+                "result": parsed_date.isoformat(),
+                "has_explicit_year": has_explicit_year,
+                "desired_weekday": desired_weekday
+            }
+        ))
+        return parsed_date
+
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+@lru_cache(maxsize=512)
+def _parse_time_cached(time_str: str, today: date) -> Tuple[Optional[time], tuple]:
+    """Parse time_str (lowercased, stripped) and return (result, log events); see _parse_date_cached."""
+    events: List[Tuple[str, Dict[str, Any]]] = []
+    return _resolve_time(time_str, today, events), tuple(events)
+
+
+def _resolve_time(time_str: str, today: date, events: list) -> Optional[time]:
+    """Body of BackendTools._parse_time; log events are appended to `events`."""
+    time_str_lower = time_str
+
+    for fmt in _FAST_TIME_FORMATS:
+        try:
+            return datetime.strptime(time_str, fmt).time()
+        except ValueError:
+            pass
+
+    try:
+        # Try dateutil parser; midnight default so minutes/seconds the text leaves out are zero
+        parsed = date_parser.parse(time_str, default=datetime.combine(today, time()))
+        events.append(("parse_time parsed", {"input": time_str, "result": parsed.time().isoformat()}))
+        return parsed.time()
+    except (ValueError, TypeError, AttributeError):
+        # Try common patterns
+        pass
+
+    try:
+        # Handle "morning", "afternoon", "evening"
+        if "morning" in time_str_lower:
+            return time(10, 0)
+        elif "afternoon" in time_str_lower:
+            return time(14, 0)
+        elif "evening" in time_str_lower:
+            return time(18, 0)
+
+        # Try to extract hour:minute
+        match = _TIME_RE.search(time_str)
+        if match:
+            hour = int(match.group(1))
+            minute = int(match.group(2)) if match.group(2) else 0
+
+            # Handle 12-hour format
+            if "pm" in time_str_lower and hour < 12:
+                hour += 12
+            elif "am" in time_str_lower and hour == 12:
+                hour = 0
+
+            return time(hour, minute)
+
+        return None
+    except (ValueError, TypeError, AttributeError, IndexError):
+        return None
+
 
 class BackendTools:
     """Collection of backend actions the agent can call."""
@@ -38,7 +211,7 @@ class BackendTools:
             "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
             "six": "6", "seven": "7", "eight": "8", "nine": "9",
         }
-        tokens = re.findall(r"[a-z]+|\d+", text)
+        tokens = _PHONE_TOKEN_RE.findall(text)
         digits: list[str] = []
         i = 0
         while i < len(tokens):
@@ -57,7 +230,7 @@ class BackendTools:
             i += 1
 
         if not digits:
-            digits = list(re.sub(r"\D", "", text))
+            digits = list(_NON_DIGIT_RE.sub("", text))
 
         if not digits:
             return None
@@ -125,164 +298,45 @@ class BackendTools:
     
     def _get_today(self) -> date:
         """Get today's date in the configured timezone."""
-        tz = gettz(APP_TIMEZONE)
-        if tz:
-            return datetime.now(tz).date()
+        if _APP_TZ:
+            return datetime.now(_APP_TZ).date()
         return date.today()
     
+    def _is_closed(self, day: date) -> bool:
+        """Whether the business is closed on `day`, per DB hours (cached in Database)."""
+        hours = self.db.get_business_hours_for_date(day, business_id=self.business_id)
+        return not hours or bool(hours.get("is_closed"))
+    
     def _parse_date(self, date_str: str) -> Optional[date]:
         """Parse natural language date string.
         
         Handles:
         - "today", "tomorrow", "yesterday"
-        - "Monday", "this Monday", "next Monday" -> upcoming Monday (including today if today is Monday)
+        - "Monday", "this Monday" -> upcoming Monday (including today if today is Monday)
+        - "next Monday" -> upcoming Monday, never today
         - Specific dates like "December 29th, 2025" or "12/29/2025"
         - Always uses current year unless explicitly specified
         """
         if not date_str:
             return None
-        
-        tz = gettz(APP_TIMEZONE)
-        now = datetime.now(tz) if tz else datetime.now()
-        today = self._get_today()
-        date_str_lower = date_str.lower().strip()
-        days = {
-            "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
-            "friday": 4, "saturday": 5, "sunday": 6
-        }
-        desired_weekday = next((num for name, num in days.items() if name in date_str_lower), None)
-        
-        # Handle relative dates first (before dateutil parser)
-        if "today" in date_str_lower:
-            logger.info("parse_date resolved relative", extra={"input": date_str, "result": today.isoformat()})
-            return today
-        elif "tomorrow" in date_str_lower:
-            logger.info("parse_date resolved relative", extra={"input": date_str, "result": (today.toordinal() + 1)})
-            return date.fromordinal(today.toordinal() + 1)
-        elif "yesterday" in date_str_lower:
-            logger.info("parse_date resolved relative", extra={"input": date_str, "result": (today.toordinal() - 1)})
-            return date.fromordinal(today.toordinal() - 1)
-        
-        # Handle day of week: "Monday", "this Monday", "next Monday"
-        for day_name, day_num in days.items():
-            if day_name in date_str_lower:
-                current_weekday = today.weekday()
-                days_ahead = day_num - current_weekday
-                
-                # Handle "this [day]" or just "[day]" - upcoming occurrence (including today)
-                if "this " in date_str_lower or days_ahead == 0:
-                    # If today is that day, return today; otherwise return next occurrence
-                    if days_ahead == 0:
-                        return today
-                    elif days_ahead < 0:
-                        days_ahead += 7
-                    return date.fromordinal(today.toordinal() + days_ahead)
-                # Handle "next [day]" - explicitly next week
-                elif "next " in date_str_lower:
-                    if days_ahead <= 0:
-                        days_ahead += 7
-                    return date.fromordinal(today.toordinal() + days_ahead)
-                # Default: upcoming occurrence (including today)
-                else:
-                    if days_ahead < 0:
-                        days_ahead += 7
-                    elif days_ahead == 0:
-                        return today
-                    return date.fromordinal(today.toordinal() + days_ahead)
-        
-        # Try dateutil parser for specific dates (e.g., "December 29th, 2025", "12/29/2025")
-        try:
-            # Check if year is explicitly mentioned in the date string
-            year_match = re.search(r'\b(19|20)\d{2}\b', date_str)
-            has_explicit_year = year_match is not None
-            
-            # Use today as default to ensure current year is used when not specified
-            parsed = date_parser.parse(date_str, default=now)
-            parsed_date = parsed.date()
-            
-            # If parsed date is in the past and no explicit year was given, adjust to current/future year
-            if parsed_date < today and not has_explicit_year:
-                # Try current year first
-                parsed_date_current_year = parsed_date.replace(year=today.year)
-                if parsed_date_current_year >= today:
-                    return parsed_date_current_year
-                # If current year is still in past, try next year
-                parsed_date_next_year = parsed_date.replace(year=today.year + 1)
-                parsed_date = parsed_date_next_year
-            
-            # Align to requested weekday if provided and no explicit year (common STT mismatch)
-            if desired_weekday is not None and not has_explicit_year:
-                if parsed_date.weekday() != desired_weekday:
-                    days_ahead = (desired_weekday - parsed_date.weekday()) % 7
-                    parsed_date = date.fromordinal(parsed_date.toordinal() + days_ahead)
-                    logger.info(
-                        "parse_date adjusted to match weekday",
-                        extra={"input": date_str, "adjusted": parsed_date.isoformat(), "desired_weekday": desired_weekday}
-                    )
-            
-            logger.info(
-                "parse_date parsed",
-                extra={
-                    "input": date_str,
-                    "result": parsed_date.isoformat(),
-                    "has_explicit_year": has_explicit_year,
-                    "desired_weekday": desired_weekday
-                }
-            )
-            return parsed_date
-            
-        except (ValueError, TypeError, AttributeError):
-            return None
+        parsed, events = _parse_date_cached(date_str.lower().strip(), self._get_today())
+        for message, extra in events:
+            logger.info(message, extra=extra)
+        return parsed
     
     def _parse_time(self, time_str: str) -> Optional[time]:
         """Parse natural language time string."""
         if not time_str:
             return None
-        tz = gettz(APP_TIMEZONE)
-        now = datetime.now(tz) if tz else datetime.now()
-        
-        try:
-            # Try dateutil parser
-            parsed = date_parser.parse(time_str, default=now)
-            logger.info("parse_time parsed", extra={"input": time_str, "result": parsed.time().isoformat()})
-            return parsed.time()
-        except (ValueError, TypeError, AttributeError):
-            # Try common patterns
-            pass
-        
-        try:
-            time_str_lower = time_str.lower()
-            
-            # Handle "morning", "afternoon", "evening"
-            if "morning" in time_str_lower:
-                return time(10, 0)
-            elif "afternoon" in time_str_lower:
-                return time(14, 0)
-            elif "evening" in time_str_lower:
-                return time(18, 0)
-            
-            # Try to extract hour:minute
-            match = re.search(r'(\d{1,2}):?(\d{2})?', time_str)
-            if match:
-                hour = int(match.group(1))
-                minute = int(match.group(2)) if match.group(2) else 0
-                
-                # Handle 12-hour format
-                if "pm" in time_str_lower and hour < 12:
-                    hour += 12
-                elif "am" in time_str_lower and hour == 12:
-                    hour = 0
-                
-                return time(hour, minute)
-            
-            return None
-        except (ValueError, TypeError, AttributeError, IndexError):
-            return None
+        parsed, events = _parse_time_cached(time_str.lower().strip(), self._get_today())
+        for message, extra in events:
+            logger.info(message, extra=extra)
+        return parsed
 
     def _time_has_meridiem(self, time_str: Optional[str]) -> bool:
         if not time_str:
             return False
-        return re.search(r"\b(am|pm)\b", time_str.lower()) is not None
+        return _MERIDIEM_RE.search(time_str.lower()) is not None
 
     def _adjust_time_to_business_hours(self, appointment_date: date, parsed_time: time, raw_time_str: Optional[str]) -> Optional[time]:
         """Adjust ambiguous times to fall within business hours when possible."""
@@ -484,10 +538,8 @@ class BackendTools:
             return {"error": "Could not parse date"}
         
         # Check business hours from DB to avoid config/DB drift
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_name = day_names[appointment_date.weekday()]
-        hours = self.db.get_business_hours_for_date(appointment_date, business_id=self.business_id)
-        is_closed = not hours or hours.get("is_closed")
+        day_name = _DAY_NAMES[appointment_date.weekday()]
+        is_closed = self._is_closed(appointment_date)
         if is_closed:
             logger.warning(f"Business is closed on {day_name} ({appointment_date})")
             return {
@@ -612,10 +664,8 @@ class BackendTools:
         )
         
         # Check business hours from DB to avoid config/DB drift
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_name = day_names[appointment_date.weekday()]
-        hours = self.db.get_business_hours_for_date(appointment_date, business_id=self.business_id)
-        is_closed = not hours or hours.get("is_closed")
+        day_name = _DAY_NAMES[appointment_date.weekday()]
+        is_closed = self._is_closed(appointment_date)
         
         if is_closed:
             logger.warning(f"Attempted to book on closed day: {day_name} ({appointment_date})")
@@ -824,7 +874,8 @@ class BackendTools:
             customer['id'],
             upcoming_only=True,
             today=self._get_today(),
-            business_id=self.business_id
+            business_id=self.business_id,
+            stream=True
         )
         
         result = {
@@ -835,11 +886,8 @@ class BackendTools:
             # Format time properly - handle timedelta from MySQL TIME columns
             apt_time = apt['appointment_time']
             if isinstance(apt_time, timedelta):
-                # Convert timedelta to time
-                total_seconds = int(apt_time.total_seconds())
-                hours = total_seconds // 3600
-                minutes = (total_seconds % 3600) // 60
-                time_str = f"{hours:02d}:{minutes:02d}"
+                minutes = _td_to_min(apt_time)
+                time_str = f"{minutes // 60:02d}:{minutes % 60:02d}"
             elif isinstance(apt_time, time):
                 time_str = apt_time.strftime("%H:%M")
             elif isinstance(apt_time, str):
@@ -914,10 +962,8 @@ class BackendTools:
         # Prepare current appointment info for the agent/customer
         current_time = target_appointment.get('appointment_time')
         if isinstance(current_time, timedelta):
-            total_seconds = int(current_time.total_seconds())
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            current_time_str = f"{hours:02d}:{minutes:02d}"
+            minutes = _td_to_min(current_time)
+            current_time_str = f"{minutes // 60:02d}:{minutes % 60:02d}"
         elif isinstance(current_time, time):
             current_time_str = current_time.strftime("%H:%M")
         else:
@@ -1029,10 +1075,8 @@ class BackendTools:
             return {"error": "Could not parse new date or time"}
         
         # Check business hours/closure for the new date (DB source of truth)
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_name = day_names[new_date.weekday()]
-        hours = self.db.get_business_hours_for_date(new_date, business_id=self.business_id)
-        is_closed = not hours or hours.get("is_closed")
+        day_name = _DAY_NAMES[new_date.weekday()]
+        is_closed = self._is_closed(new_date)
         
         if is_closed:
             return {
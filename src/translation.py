@@ -1,28 +1,69 @@
 """Lightweight translation helper using OpenAI chat."""
 import json
 import re
-from typing import Optional
+from collections import OrderedDict
+from typing import Optional, Tuple
 
+from src.openai_client import get_async_client
+
+
+_ARABIC_RE = re.compile(r"[\u0600-\u06FF]")
 
 LANGUAGE_NAME = {
     "en": "English",
     "ar": "Arabic",
 }
 
+# One-word replies that are English regardless of the caller's language.
+_ENGLISH_TOKENS = frozenset({"yes", "no", "ok", "okay", "sure", "bye"})
+
+# (kind, model, normalized text, target) -> result; short confirmations repeat a lot.
+_CACHE_SIZE = 1024
+_cache: "OrderedDict[Tuple[str, str, str, str], str]" = OrderedDict()
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _cache_get(key: Tuple[str, str, str, str]) -> Optional[str]:
+    value = _cache.get(key)
+    if value is not None:
+        _cache.move_to_end(key)
+    return value
+
+
+def _cache_put(key: Tuple[str, str, str, str], value: str):
+    _cache[key] = value
+    _cache.move_to_end(key)
+    if len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+
 
 class Translator:
-    def __init__(self, client, model: str):
-        self.client = client
+    def __init__(self, model: str, api_key: Optional[str] = None):
         self.model = model
+        self.api_key = api_key
 
-    def detect_language(self, text: str) -> str:
+    @property
+    def client(self):
+        return get_async_client(self.api_key)
+
+    async def detect_language(self, text: str) -> str:
         if not text or not text.strip():
             return "en"
         # Fast-path for Arabic to avoid extra calls
-        if re.search(r"[\u0600-\u06FF]", text):
+        if _ARABIC_RE.search(text):
             return "ar"
+        normalized = _normalize(text)
+        if normalized.strip(".,!?") in _ENGLISH_TOKENS:
+            return "en"
+        key = ("detect", self.model, normalized, "")
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
@@ -39,17 +80,25 @@ class Translator:
                 response_format={"type": "json_object"},
             )
             payload = json.loads(response.choices[0].message.content)
-            lang = str(payload.get("language", "en")).lower().strip()
-            return lang or "en"
+            lang = str(payload.get("language", "en")).lower().strip() or "en"
+            _cache_put(key, lang)
+            return lang
         except Exception:
             return "en"
 
-    def translate(self, text: str, target_language: str) -> str:
+    async def translate(self, text: str, target_language: str) -> str:
         if not text or not text.strip():
             return text
+        normalized = _normalize(text)
+        if target_language == "en" and normalized.strip(".,!?") in _ENGLISH_TOKENS:
+            return text
+        key = ("translate", self.model, normalized, target_language)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
         target_name = LANGUAGE_NAME.get(target_language, target_language)
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
@@ -64,6 +113,8 @@ class Translator:
                 ],
                 temperature=0.2,
             )
-            return response.choices[0].message.content.strip()
+            translated = response.choices[0].message.content.strip()
+            _cache_put(key, translated)
+            return translated
         except Exception:
             return text
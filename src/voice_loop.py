@@ -21,6 +21,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7F]")
+_MERIDIEM_PREFIX_RE = re.compile(r"\s*(am|pm)\b")
+_CLOCK_24H_RE = re.compile(r"\b([01]?\d|2[0-3]):[0-5]\d\b")
+
 
 class VoiceLoop:
     """Main voice conversation loop."""
@@ -39,7 +43,7 @@ class VoiceLoop:
         
         # Initialize components
         config_path = os.getenv('CONFIG_FILE', 'config/business_config.yaml')
-        self.config = ConfigLoader(config_path)
+        self.config = ConfigLoader.get_or_load(config_path)
         self.database = Database()
         self.tools = BackendTools(self.database, self.config)
         self.agent = Agent(OPENAI_API_KEY, self.config, self.database, self.tools)
@@ -439,7 +443,7 @@ class VoiceLoop:
         if not text:
             return text
         # Skip time humanization for non-English output to avoid corrupting localized times
-        if re.search(r"[^\x00-\x7F]", text):
+        if _NON_ASCII_RE.search(text):
             return text
 
         def _repl(match: re.Match) -> str:
@@ -447,11 +451,11 @@ class VoiceLoop:
             start = match.start()
             end = match.end()
             tail = text[end:end + 6].lower()
-            if re.match(r"\s*(am|pm)\b", tail):
+            if _MERIDIEM_PREFIX_RE.match(tail):
                 return value
             return self._format_time_for_speech(value)
 
-        return re.sub(r"\b([01]?\d|2[0-3]):[0-5]\d\b", _repl, text)
+        return _CLOCK_24H_RE.sub(_repl, text)
 
     def _finalize_call(self, conversation_complete: bool):
         """Persist call transcript and outcome."""